@@ -0,0 +1,52 @@
+import importlib.util
+import logging
+import os
+import sys
+from functools import partial
+
+import pytest
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'youtube-crawler.py')
+
+
+def _load_crawler_module():
+    # 脚本文件名带连字符，不能直接 import，按文件路径加载
+    spec = importlib.util.spec_from_file_location('youtube_crawler', SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+ytc_module = _load_crawler_module()
+logging.getLogger('youtube_crawler').setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope='session')
+def ytc():
+    return ytc_module
+
+
+@pytest.fixture(scope='session')
+def thumbnail_server(ytc):
+    with ytc.ThumbnailServer(size=256) as server:
+        yield server
+
+
+@pytest.fixture
+def make_crawler(ytc, thumbnail_server, tmp_path):
+    """
+    返回创建离线爬虫的函数：使用模拟提取器和本地缩略图服务器，不访问网络
+    """
+    def make(output_dir=None, max_workers=4, corpus_size=200, stats=None, daily_limit=float('inf'),
+             checkpoint_interval=ytc.CHECKPOINT_INTERVAL):
+        factory = partial(ytc.FakeYoutubeDL, latency=0, corpus_size=corpus_size,
+                          thumbnail_base=thumbnail_server.base_url, stats=stats)
+        crawler = ytc.YouTubeCrawler(max_workers=max_workers, requests_per_second=1000.0, cookie_files=[],
+                                     output_dir=str(output_dir or tmp_path), ydl_factory=factory,
+                                     checkpoint_interval=checkpoint_interval)
+        crawler.quota.daily_limit = daily_limit
+        crawler.throttle.jitter = 0
+        return crawler
+
+    return make
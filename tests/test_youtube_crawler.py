@@ -0,0 +1,278 @@
+import csv
+import glob
+import json
+import os
+import random
+import threading
+import time
+
+import pytest
+
+LEGACY_DIMENSIONS = {
+    'AI技术': {'keywords': ['ai', '人工智能', '机器学习', '深度学习', '神经网络'], 'weight': 0.25},
+    '云计算': {'keywords': ['云计算', '云服务', '云平台', 'cloud', 'saas'], 'weight': 0.2},
+    '数字化': {'keywords': ['数字化', '数字转型', '智能化', '自动化', '信息化'], 'weight': 0.2},
+    '创新': {'keywords': ['创新', '革新', '突破', '前沿', '领先'], 'weight': 0.15},
+    '解决方案': {'keywords': ['解决方案', '应用', '落地', '实践', '案例'], 'weight': 0.2},
+}
+
+
+def legacy_score(video):
+    """
+    最初版本 calculate_score 的逐条视频评分规则
+    """
+    text = ((video.get('title', '') or '') + ' ' + (video.get('description', '') or '')).lower()
+    dimension_scores = {}
+    for dim_name, dim_data in LEGACY_DIMENSIONS.items():
+        matches = sum(1 for keyword in dim_data['keywords'] if keyword in text)
+        dimension_scores[dim_name] = round((matches / len(dim_data['keywords'])) * dim_data['weight'], 3)
+    return {'total_score': round(min(sum(dimension_scores.values()), 1), 3), 'dimension_scores': dimension_scores}
+
+
+def latest_output(output_dir, extension):
+    return max(glob.glob(os.path.join(str(output_dir), f'youtube_search_results_*.{extension}')),
+               key=os.path.getmtime)
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_scorer_matches_legacy_rule(ytc):
+    vocabulary = [keyword for config in LEGACY_DIMENSIONS.values() for keyword in config['keywords']]
+    vocabulary += ['AI', 'Cloud', 'SaaS', 'airline', '发布会', 'demo', '平台', '']
+    rnd = random.Random(0)
+    crawler = ytc.YouTubeCrawler.__new__(ytc.YouTubeCrawler)
+    crawler.scorer = ytc.KeywordScorer()
+
+    for _ in range(2000):
+        video = {
+            'title': ' '.join(rnd.choices(vocabulary, k=rnd.randint(0, 4))),
+            'description': ''.join(rnd.choices(vocabulary, k=rnd.randint(0, 12))),
+        }
+        expected = legacy_score(video)
+        score = crawler.calculate_score(video)
+        assert score['total_score'] == pytest.approx(expected['total_score'], abs=1e-9), video
+        for dim_name, dim_score in expected['dimension_scores'].items():
+            assert score['dimension_scores'][dim_name] == pytest.approx(dim_score, abs=1e-9), video
+
+
+@pytest.mark.parametrize('count', [1, 2, 4])
+def test_rank_with_fewer_videos_than_neighbors(ytc, tmp_path, count):
+    videos = ytc.synthetic_records(count, seed=1)
+    index_path = str(tmp_path / ytc.RANK_INDEX_FILE)
+
+    ranked = ytc.rank_records(videos, ['AI创新'], index_path)
+
+    assert sorted(video['video_id'] for video in ranked) == sorted(video['video_id'] for video in videos)
+    batch = ytc.VideoBatch.from_records(videos)
+    order = batch.rank_order(['AI创新'], index_path)
+    assert [batch.columns['video_id'][position] for position in order] == [video['video_id'] for video in ranked]
+
+
+def test_resume_after_quota_exceeded(ytc, make_crawler, tmp_path):
+    keywords = ['AI创新']
+    full_dir = tmp_path / 'full'
+    make_crawler(full_dir).crawl_and_save(keywords)
+    expected_ids = {record['video_id'] for record in read_jsonl(latest_output(full_dir, 'jsonl'))}
+
+    resume_dir = tmp_path / 'resume'
+    first = make_crawler(resume_dir, max_workers=1, daily_limit=40)
+    tasks = first._build_search_tasks(keywords)
+    first.crawl_and_save(keywords)
+    with open(resume_dir / ytc.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+        completed = len(json.load(f)['completed_tasks'])
+    assert 0 < completed < len(tasks)
+
+    stats = ytc.Counter()
+    make_crawler(resume_dir, stats=stats).crawl_and_save(keywords, resume=True)
+
+    # 已完成的任务不再搜索，合并后的结果与一次完整爬取相同
+    assert stats['queries'] == len(tasks) - completed
+    assert {record['video_id'] for record in read_jsonl(latest_output(resume_dir, 'jsonl'))} == expected_ids
+
+
+def test_one_row_per_video_with_merged_hits(ytc, make_crawler, tmp_path):
+    make_crawler(tmp_path, corpus_size=40).crawl_and_save(['AI创新', '科技峰会'])
+
+    records = read_jsonl(latest_output(tmp_path, 'jsonl'))
+    video_ids = [record['video_id'] for record in records]
+    assert records and len(video_ids) == len(set(video_ids))
+    with open(latest_output(tmp_path, 'csv'), 'r', newline='', encoding='utf-8-sig') as f:
+        assert sorted(row['视频ID'] for row in csv.DictReader(f)) == sorted(video_ids)
+
+    merged = [record for record in records if len(record['search_hits']) > 1]
+    assert merged
+    for record in merged:
+        categories = record['category'].split(ytc.HIT_SEPARATOR)
+        assert set(categories) == {category for category, _, _ in record['search_hits']}
+        assert len(categories) == len(set(categories))
+
+
+def test_result_store_upsert_and_query(ytc, tmp_path):
+    records = ytc.score_records(ytc.synthetic_records(50, seed=2))
+    store = ytc.ResultStore(str(tmp_path / ytc.RESULT_DB_FILE), batch_size=7)
+    try:
+        assert store.upsert(records) == 50
+        # 重复写入只更新，不产生重复记录
+        changed = dict(records[0], total_score=5.0)
+        assert store.upsert([changed]) == 1
+        assert sum(1 for _ in store.iter_all(chunk_size=9)) == 50
+
+        top = store.query(limit=3)
+        assert top[0]['video_id'] == changed['video_id']
+        assert [record['total_score'] for record in top] == sorted((r['total_score'] for r in top), reverse=True)
+
+        category = records[1]['category']
+        by_category = store.query(category=category)
+        assert by_category and all(category in [hit[0] for hit in r['search_hits']] for r in by_category)
+
+        since = sorted(record['published_at'] for record in records)[25]
+        recent = store.query(since=since, order_by='view_count')
+        assert recent and all(record['published_at'] >= since for record in recent)
+        assert store.query(min_score=4.0) == [store.query(limit=1)[0]]
+        with pytest.raises(ValueError):
+            store.query(order_by='title; DROP TABLE videos')
+    finally:
+        store.close()
+
+
+def test_concurrent_crawl_with_checkpointing(ytc, make_crawler, tmp_path):
+    # 每个任务完成后都写入进度文件，与写入记录的线程最大程度地并发
+    for run in range(5):
+        output_dir = tmp_path / f'run{run}'
+        crawler = make_crawler(output_dir, max_workers=8, corpus_size=100, checkpoint_interval=0)
+        tasks = crawler._build_search_tasks(ytc.DEFAULT_KEYWORDS)
+        crawler.crawl_and_save(ytc.DEFAULT_KEYWORDS)
+
+        with open(output_dir / ytc.CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        assert len(checkpoint['completed_tasks']) == len(tasks)
+        records = read_jsonl(latest_output(output_dir, 'jsonl'))
+        assert records and all('total_score' in record for record in records)
+
+
+def test_post_process_results(ytc):
+    crawler = ytc.YouTubeCrawler.__new__(ytc.YouTubeCrawler)
+    base = {'duration': ytc.MIN_DURATION, 'view_count': 101, 'like_count': 11}
+    videos = [
+        dict(base, video_id='min_duration'),
+        dict(base, video_id='max_duration', duration=ytc.MAX_DURATION),
+        dict(base, video_id='too_short', duration=ytc.MIN_DURATION - 1),
+        dict(base, video_id='too_long', duration=ytc.MAX_DURATION + 1),
+        dict(base, video_id='few_views', view_count=100),
+        dict(base, video_id='few_likes', like_count=10),
+        {'video_id': 'missing_stats'},
+    ]
+
+    assert [video['video_id'] for video in crawler.post_process_results(videos)] == ['min_duration', 'max_duration']
+
+
+def test_download_thumbnail_skips_stored_and_dedups_content(ytc, make_crawler, thumbnail_server):
+    crawler = make_crawler()
+    before = thumbnail_server.stats['requests']
+
+    first = crawler.download_thumbnail(f"{thumbnail_server.base_url}/vi/a/hqdefault.jpg", 'video_a')
+    again = crawler.download_thumbnail(f"{thumbnail_server.base_url}/vi/a/hqdefault.jpg", 'video_a')
+    # 服务器对所有路径返回相同内容，第二个视频复用第一个文件
+    other = crawler.download_thumbnail(f"{thumbnail_server.base_url}/vi/b/hqdefault.jpg", 'video_b')
+
+    assert first and os.path.exists(first)
+    assert again == first and other == first
+    assert thumbnail_server.stats['requests'] - before == 2
+    stored = [name for _, _, files in os.walk(crawler.thumbnail_store.root_dir) for name in files
+              if name.endswith('.jpg')]
+    assert len(stored) == 1
+
+
+def test_repeat_crawl_requests_no_thumbnails(ytc, make_crawler, thumbnail_server, tmp_path):
+    make_crawler(tmp_path, corpus_size=40).crawl_and_save(['AI创新'])
+    records = read_jsonl(latest_output(tmp_path, 'jsonl'))
+    assert records and all(record['thumbnail_path'] for record in records)
+
+    before = thumbnail_server.stats['requests']
+    make_crawler(tmp_path, corpus_size=40).crawl_and_save(['AI创新'])
+    assert thumbnail_server.stats['requests'] == before
+
+
+def test_metadata_cache_ttl_and_eviction(ytc, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ytc.time, 'time', lambda: clock[0])
+    cache = ytc.MetadataCache(str(tmp_path / 'cache.sqlite'), static_ttl=100, stats_ttl=10, max_entries=5)
+    info = {'id': 'v1', 'title': 't', 'duration': 60, 'view_count': 500, 'like_count': 20}
+    cache.put(info)
+
+    assert cache.get('v1')['view_count'] == 500
+    # 统计字段过期后只返回不变字段，不变字段过期后整条失效
+    clock[0] += 11
+    assert cache.get('v1')['title'] == 't' and 'view_count' not in cache.get('v1')
+    clock[0] += 90
+    assert cache.get('v1') is None
+
+    # 超过容量时淘汰最久未访问的记录（每写入 1000 条检查一次）
+    cache = ytc.MetadataCache(str(tmp_path / 'lru.sqlite'), max_entries=5)
+    for i in range(999):
+        clock[0] += 1
+        cache.put({'id': f"bulk{i}", 'title': 't'})
+    clock[0] += 1
+    assert cache.get('bulk0') is not None
+    clock[0] += 1
+    cache.put({'id': 'last', 'title': 't'})
+
+    assert cache._conn.execute('SELECT COUNT(*) FROM video_metadata').fetchone()[0] == 5
+    assert cache.get('bulk1') is None and cache.get('bulk995') is None
+    for video_id in ('bulk0', 'bulk996', 'bulk998', 'last'):
+        assert cache.get(video_id) is not None
+
+
+def test_rate_limiter_halves_once_per_throttle_episode(ytc):
+    limiter = ytc.AdaptiveRateLimiter(rate=1.0, min_rate=0.1, jitter=0)
+    backoff = limiter._backoff
+    for _ in range(4):
+        limiter.report_throttled()
+
+    assert limiter.rate == 0.5
+    assert limiter._backoff == backoff * 2
+    assert limiter._paused_until - time.monotonic() <= backoff
+
+
+def test_rate_limiter_spaces_requests_after_pause(ytc):
+    limiter = ytc.AdaptiveRateLimiter(rate=20.0, min_rate=1.0, burst=1, jitter=0)
+    limiter._backoff = 0.2
+    limiter.acquire()
+    start = time.monotonic()
+    limiter.report_throttled()
+
+    times = []
+    threads = [threading.Thread(target=lambda: (limiter.acquire(), times.append(time.monotonic() - start)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 暂停结束后按降低后的速率（10 次/秒）依次放行，而不是同时发出
+    times.sort()
+    assert times[0] >= 0.2
+    assert all(later - earlier >= 0.08 for earlier, later in zip(times, times[1:]))
+
+
+def test_credential_pool_cooldown_once_per_episode(ytc):
+    pool = ytc.CredentialPool.from_credentials(['a.txt', 'b.txt'])
+    first, second = pool.identities
+    for _ in range(4):
+        pool.report_error(first, throttled=True)
+
+    assert first.errors == 4 and first.throttled == 4
+    assert first.cooldown_until - time.monotonic() <= ytc.IDENTITY_COOLDOWN
+    assert first.cooldown == ytc.IDENTITY_COOLDOWN * 2
+    # 冷却中的身份不再分配
+    identity = pool.acquire()
+    assert identity is second
+    pool.release(identity)
+
+
+def test_credential_pool_ignores_api_keys_for_identities(ytc):
+    pool = ytc.CredentialPool.from_credentials([], ['key1', 'key2', 'key3'])
+    assert len(pool) == 1 and pool.identities[0].api_key == 'key1'
@@ -1,32 +1,2373 @@
+from __future__ import annotations
+
+import time
+
+# 记录脚本开始加载的时间，用于启动耗时报告
+_START_TIME = time.perf_counter()
+
 import os
+import sys
 import csv
-import time
+import json
+import sqlite3
+import argparse
+import importlib
+import re
 import random
+import logging
 from typing import List, Dict
 from datetime import datetime, timedelta
-import yt_dlp
-import jieba
-from collections import Counter
-import requests
+from collections import Counter, OrderedDict, deque
+from array import array
 from urllib.parse import urlparse
 import hashlib
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
+import pickle
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+
+
+# 记录每个延迟导入模块的耗时（秒）
+IMPORT_TIMES = {}
+
+
+class _LazyModule:
+    """
+    延迟导入的模块代理，第一次访问属性时才真正导入
+
+    yt_dlp、jieba、numpy、scipy、requests 导入较慢且占用内存较多，
+    只在实际用到它们的命令中加载。
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            IMPORT_TIMES.setdefault(self._name, time.perf_counter() - start)
+            self._module = module
+        return getattr(module, attr)
+
+
+yt_dlp = _LazyModule('yt_dlp')
+jieba = _LazyModule('jieba')
+requests = _LazyModule('requests')
+np = _LazyModule('numpy')
+sparse = _LazyModule('scipy.sparse')
+
+# 在文件开头添加cookies文件路径配置
+COOKIES_FILE = 'cookies.txt'  # 将cookies.txt文件放在与脚本相同目录下
+
+# 默认搜索关键词
+DEFAULT_KEYWORDS = [
+    "AI创新",
+    "科技峰会"
+]
+
+# 启动耗时预算（秒），使用 --startup-report 查看实际耗时
+STARTUP_BUDGET = 0.3
+
+# 并发搜索配置
+MAX_WORKERS = 4  # 同时执行搜索的线程数
+REQUESTS_PER_SECOND = 1.0  # 全局初始请求速率（所有线程共享），运行中按限流信号自动调整
+REQUEST_JITTER = 0.5  # 每次请求额外随机延迟的上限（秒）
+
+# 自适应限速与每日配额
+MIN_REQUESTS_PER_SECOND = 0.1  # 限流后速率的下限
+MAX_REQUESTS_PER_SECOND = 4.0  # 正常时速率的上限
+RATE_LIMIT_BURST = 2  # 令牌桶容量，允许的短时突发请求数
+RATE_RECOVERY_STREAK = 20  # 连续成功多少次后提高一次速率
+RATE_INCREASE_STEP = 0.1  # 每次提高的速率（次/秒）
+THROTTLE_BACKOFF = 30  # 第一次限流后的暂停时间（秒），连续限流时逐次加倍
+MAX_THROTTLE_BACKOFF = 600  # 暂停时间上限（秒）
+THROTTLE_SIGNALS = ('429', 'too many requests', 'not a bot', 'rate-limit', 'rate limit', 'captcha')
+DAILY_REQUEST_QUOTA = 2000  # 每日最多发出的请求数（搜索和视频信息提取都计入）
+QUOTA_FILE = 'quota_usage.json'  # 配额用量文件名（位于输出目录下），跨次运行累计
+
+# 多身份轮换配置
+IDENTITY_COOLDOWN = 300  # 身份被限流后的冷却时间（秒），连续限流时逐次加倍
+MAX_IDENTITY_COOLDOWN = 3600  # 身份冷却时间上限（秒）
+IDENTITY_MAX_ERRORS = 5  # 身份连续出错多少次后进入冷却
+
+# 缩略图下载配置
+THUMBNAIL_WORKERS = 8  # 后台下载缩略图的线程数
+THUMBNAIL_CHUNK_SIZE = 64 * 1024  # 流式写入磁盘的块大小（字节）
+THUMBNAIL_DIR = 'thumbnails'  # 缩略图存储目录（位于输出目录下）
+
+# 搜索配置
+SEARCH_RESULTS_PER_QUERY = 20  # 每个搜索词的初步（轻量）搜索结果数，即 ytsearchN 中的 N
+TWO_PHASE_SEARCH = True  # 先用轻量搜索结果预筛选，只对通过筛选的视频提取完整信息
+MAX_VIDEO_AGE_DAYS = 730  # 视频发布至今的最大天数（2年）
+MIN_DURATION = 10  # 视频最短时长（秒）
+MAX_DURATION = 240  # 视频最长时长（秒）
+
+# 断点续爬配置
+CHECKPOINT_FILE = 'search_progress.json'  # 进度文件名（位于输出目录下）
+CHECKPOINT_INTERVAL = 30  # 两次写入进度文件的最小间隔（秒）
+
+# 增量爬取配置
+SEEN_INDEX_FILE = 'seen_videos.db'  # 已爬取视频索引文件名（位于输出目录下），跨次运行去重
+STATS_REFRESH_DAYS = 7  # 增量模式下，已爬取视频的播放量等统计超过该天数后可重新获取
+HIT_SEPARATOR = '; '  # 同一视频命中多个类别、关键词或语言时的分隔符
+SEARCH_HIT_FIELDS = ('category', 'search_keyword', 'search_language')  # 按命中合并的字段
+
+# 结果输出配置
+OUTPUT_FORMATS = ('csv', 'jsonl')  # 流式输出格式，可选 'csv'、'jsonl'、'parquet'（需要 pyarrow）
+OUTPUT_FLUSH_EVERY = 50  # 每写入多少条记录刷新并同步一次磁盘
+
+# 结果数据库配置
+RESULT_DB_FILE = 'results.db'  # 结果数据库文件名（位于输出目录下），累积保存所有爬取结果
+RESULT_STORE_BATCH_SIZE = 1000  # 批量写入时每个事务包含的视频数
+RESULT_QUERY_ORDERS = ('total_score', 'published_at', 'view_count', 'like_count')  # 查询结果可用的排序字段
+
+# 基准测试配置
+BENCH_SIZES = (1000, 10000, 100000)  # 离线阶段使用的合成视频数量，可通过 --sizes 指定（最多到 1000000）
+BENCH_CRAWL_LATENCY = 0.02  # 模拟提取器每次请求的延迟（秒）
+BENCH_CORPUS_SIZE = 2000  # 模拟搜索结果中视频 ID 的取值范围，越小则不同搜索重复命中越多
+BENCH_THUMBNAIL_BYTES = 16 * 1024  # 本地缩略图服务器返回的图片大小（字节）
+BENCH_REGRESSION_TOLERANCE = 0.2  # 耗时比基线增加超过该比例时视为性能回退
+
+# CSV 列名及其对应的结果字段
+CSV_FIELDNAMES = [
+    '标题', 
+    '描述', 
+    '发布时间', 
+    '视频ID', 
+    '频道名称', 
+    '缩略图文件名',
+    '分类', 
+    '搜索关键词', 
+    '视频链接',
+    '视频时长(秒)',
+    '搜索语言',
+    '总评分',
+    'AI技术得分',
+    '云计算得分',
+    '数字化得分',
+    '创新得分',
+    '解决方案得分'
+]
+
+# 评分维度：每个维度的关键词及其权重（权重总和建议保持为 1）
+SCORING_DIMENSIONS = {
+    'AI技术': {
+        'keywords': ['ai', '人工智能', '机器学习', '深度学习', '神经网络'],
+        'weight': 0.25
+    },
+    '云计算': {
+        'keywords': ['云计算', '云服务', '云平台', 'cloud', 'saas'],
+        'weight': 0.2
+    },
+    '数字化': {
+        'keywords': ['数字化', '数字转型', '智能化', '自动化', '信息化'],
+        'weight': 0.2
+    },
+    '创新': {
+        'keywords': ['创新', '革新', '突破', '前沿', '领先'],
+        'weight': 0.15
+    },
+    '解决方案': {
+        'keywords': ['解决方案', '应用', '落地', '实践', '案例'],
+        'weight': 0.2
+    }
+}
+
+# 排序配置
+RANK_INDEX_FILE = 'rank_index.pkl'  # 排序索引缓存文件名（位于输出目录下）
+RANK_NEIGHBORS = 5  # 计算聚集度时使用的近邻数
+RANK_HASH_FEATURES = 2 ** 18  # 分词特征哈希到的维度
+RANK_EXACT_LIMIT = 5000  # 语料不超过该规模时精确计算近邻，超过后使用 LSH 近似近邻
+RANK_LSH_TABLES = 8  # LSH 哈希表数量
+RANK_LSH_BITS = 12  # 每个 LSH 哈希表的签名位数
+RANK_PROJECTION_DIM = 4096  # 生成随机超平面时特征折叠到的维度
+RANK_MAX_CANDIDATES = 500  # 近似查找时每个视频最多比较的候选数
+
+# 分词配置
+TOKEN_CACHE_SIZE = 50000  # 分词结果缓存的最大条数
+TOKENIZE_PROCESSES = os.cpu_count() or 1  # 批量分词时 jieba 并行模式使用的进程数
+TOKENIZE_PARALLEL_MIN = 2000  # 批量分词的文本数达到该值时才启用并行模式
+
+# 离线重新评分配置
+RESCORE_PROCESSES = os.cpu_count() or 1  # 重新评分和提取排序特征使用的进程数
+RESCORE_CHUNK_SIZE = 5000  # 每个子进程任务包含的记录数
+
+# 视频元数据缓存配置
+METADATA_CACHE_FILE = 'metadata_cache.sqlite'  # 缓存数据库文件名（位于输出目录下）
+METADATA_STATIC_TTL = 30 * 24 * 3600  # 标题、发布日期等不变字段的有效期（秒）
+METADATA_STATS_TTL = 24 * 3600  # 播放量、点赞数等统计字段的有效期（秒）
+METADATA_CACHE_MAX_ENTRIES = 200000  # 缓存最多保留的视频数，超出后按最近访问时间淘汰
+
+# 指标与日志配置
+METRICS_PREFIX = 'youtube_crawler'  # Prometheus 指标名前缀
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # 延迟直方图的桶上限（秒）
+METRICS_WRITE_INTERVAL = 15  # 爬取过程中写入 Prometheus 指标文件的最小间隔（秒）
+METRICS_HOST = '127.0.0.1'  # 指标 HTTP 服务默认只监听本机，需要其他主机访问时通过 --metrics-host 指定
+
+logger = logging.getLogger('youtube_crawler')
+
+
+def log_fields(event: str, **fields) -> Dict:
+    """
+    构造 logging 的 extra 参数，事件名和字段会写入 JSON 行事件日志
+    """
+    return {'event': event, 'fields': fields}
+
+
+class JsonLinesHandler(logging.Handler):
+    """
+    将日志记录以 JSON 行格式追加到事件日志文件，每行包含时间、级别、事件名、消息和附加字段
+    """
+    def __init__(self, path: str):
+        super().__init__()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = {
+                'ts': round(record.created, 3),
+                'level': record.levelname,
+                'event': getattr(record, 'event', record.funcName),
+                'message': record.getMessage(),
+                'thread': record.threadName,
+            }
+            entry.update(getattr(record, 'fields', {}))
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            self._file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            self._file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def setup_logging(level: int = logging.INFO, event_log: str = None):
+    """
+    配置日志输出：控制台只输出消息文本，指定 event_log 时同时写入 JSON 行事件日志
+    """
+    logger.setLevel(level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(console)
+    if event_log:
+        logger.addHandler(JsonLinesHandler(event_log))
+
+
+class Metrics:
+    """
+    进程内指标：计数器、仪表和延迟直方图，线程安全，可输出为 Prometheus 文本格式
+
+    指标以 (名称, 标签) 为键；timed 上下文同时记录阶段耗时和正在执行该阶段的线程数。
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}  # 键 -> [各桶计数..., 总和, 次数]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> tuple:
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[position] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @contextmanager
+    def timed(self, stage: str):
+        """
+        记录一个阶段的耗时，执行期间该阶段的活跃线程数加一
+        """
+        self.add_gauge('active_workers', 1, stage=stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_latency_seconds', time.perf_counter() - start, stage=stage)
+            self.add_gauge('active_workers', -1, stage=stage)
+
+    def snapshot(self) -> Dict:
+        """
+        返回当前所有计数器和仪表的值，以及各直方图的次数和总耗时
+        """
+        def label(name, labels):
+            return name + ''.join(f"[{key}={value}]" for key, value in labels)
+        
+        with self._lock:
+            data = {label(*key): value for key, value in self._counters.items()}
+            data.update({label(*key): value for key, value in self._gauges.items()})
+            for key, histogram in self._histograms.items():
+                data[label(*key) + '.count'] = histogram[-1]
+                data[label(*key) + '.sum'] = round(histogram[-2], 6)
+        return data
+
+    def prometheus_text(self) -> str:
+        """
+        输出 Prometheus 文本格式（text/plain; version=0.0.4）
+        """
+        def render(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return name
+            return name + '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+        
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        
+        declared = set()
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for (name, labels), value in items:
+                full_name = f"{METRICS_PREFIX}_{name}"
+                if full_name not in declared:
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    declared.add(full_name)
+                lines.append(f"{render(full_name, labels)} {value}")
+        for (name, labels), histogram in histograms:
+            full_name = f"{METRICS_PREFIX}_{name}"
+            if full_name not in declared:
+                lines.append(f"# TYPE {full_name} histogram")
+                declared.add(full_name)
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                lines.append(f"{render(full_name + '_bucket', labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{render(full_name + '_bucket', labels, [('le', '+Inf')])} {histogram[-1]}")
+            lines.append(f"{render(full_name + '_sum', labels)} {histogram[-2]}")
+            lines.append(f"{render(full_name + '_count', labels)} {histogram[-1]}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """
+        写入临时文件后原子替换，供 node_exporter 的 textfile 收集器读取
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def write_periodically(self, path: str, interval: float = METRICS_WRITE_INTERVAL) -> threading.Event:
+        """
+        在后台线程中每隔 interval 秒写入一次指标文件，返回用于停止写入的事件
+        """
+        stop = threading.Event()
+        
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError as e:
+                    logger.warning(f"写入指标文件失败: {e}")
+        
+        threading.Thread(target=run, name='metrics-writer', daemon=True).start()
+        return stop
+
+    def serve(self, port: int, host: str = METRICS_HOST):
+        """
+        在后台线程中启动 HTTP 服务，任意路径都返回 Prometheus 文本格式的指标
+
+        服务没有认证，默认只监听本机地址。
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"指标服务已启动: http://{host}:{server.server_port}/metrics")
+        return server
+
+
+# 全局指标，所有阶段共用
+METRICS = Metrics()
+
+
+class QuotaExceededError(Exception):
+    """
+    当日请求配额已用完
+    """
+
+
+class QuotaTracker:
+    """
+    每日请求配额计数，持久化到文件中，跨多次运行累计
+    """
+    def __init__(self, path: str, daily_limit: int = DAILY_REQUEST_QUOTA, save_every: int = 20):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self.date = datetime.now().strftime('%Y-%m-%d')
+        self.used = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('date') == self.date:
+                    self.used = int(data.get('used', 0))
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取配额文件失败: {e}")
+
+    def consume(self) -> bool:
+        """
+        占用一次请求配额，配额已用完时返回 False
+        """
+        with self._lock:
+            today = datetime.now().strftime('%Y-%m-%d')
+            if today != self.date:
+                self.date = today
+                self.used = 0
+            if self.used >= self.daily_limit:
+                return False
+            self.used += 1
+            due = self.used % self.save_every == 0
+        if due:
+            self.save()
+        return True
+
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.daily_limit - self.used)
+
+    def save(self):
+        """
+        写入临时文件后原子替换配额文件
+        """
+        with self._lock:
+            data = {'date': self.date, 'used': self.used}
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存配额文件失败: {e}")
+
+
+class AdaptiveRateLimiter:
+    """
+    全局自适应令牌桶限速器，所有工作线程共享
+
+    每次真实的网络请求前调用 acquire 占用一个令牌和一次每日配额。
+    收到限流信号（HTTP 429、人机验证等）时速率减半并暂停一段时间，暂停时间逐次加倍；
+    连续成功一定次数后逐步提高速率，直到上限。
+    """
+    def __init__(self, rate: float = REQUESTS_PER_SECOND, min_rate: float = MIN_REQUESTS_PER_SECOND,
+                 max_rate: float = MAX_REQUESTS_PER_SECOND, burst: float = RATE_LIMIT_BURST,
+                 jitter: float = REQUEST_JITTER, quota: QuotaTracker = None):
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate, rate)
+        self.burst = burst
+        self.jitter = jitter
+        self.quota = quota
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = THROTTLE_BACKOFF
+        self._successes = 0
+
+    def acquire(self):
+        """
+        阻塞直到允许发出下一个请求；每日配额用完时抛出 QuotaExceededError
+        """
+        if self.quota is not None and not self.quota.consume():
+            raise QuotaExceededError("达到每日请求配额限制")
+        
+        with self._lock:
+            now = time.monotonic()
+            # 暂停期间令牌桶的计时起点在暂停结束时刻，此前不补充令牌
+            if now > self._last_refill:
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+            # 令牌不足时预约未来的令牌，令牌数可以为负
+            self._tokens -= 1
+            delay = max(0.0, self._last_refill - now) + max(0.0, -self._tokens / self.rate)
+            delay = max(delay, self._paused_until - now)
+        time.sleep(delay + random.uniform(0, self.jitter))
+
+    def report_success(self):
+        """
+        请求正常返回，连续成功达到一定次数后提高速率
+        """
+        with self._lock:
+            self._backoff = THROTTLE_BACKOFF
+            self._successes += 1
+            if self._successes >= RATE_RECOVERY_STREAK:
+                self._successes = 0
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE_STEP)
+
+    def report_throttled(self):
+        """
+        收到限流信号，降低速率并暂停
+
+        暂停期间收到的信号属于同一次限流（例如并发请求同时收到 429），不再重复降速和加倍暂停时间。
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return
+            self._successes = 0
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + self._backoff)
+            # 暂停结束后按降低后的速率依次放行，而不是所有等待的线程同时发出请求
+            self._last_refill = max(self._last_refill, self._paused_until)
+            METRICS.inc('throttled_total')
+            logger.warning(f"检测到限流，速率降至 {self.rate:.2f} 次/秒，暂停 {self._backoff:.0f} 秒",
+                           extra=log_fields('throttled', rate=self.rate, backoff=self._backoff))
+            self._backoff = min(self._backoff * 2, MAX_THROTTLE_BACKOFF)
+
+    def check_message(self, message: str) -> bool:
+        """
+        判断错误信息是否为限流信号，是则按限流处理
+        """
+        text = str(message).lower()
+        if any(signal in text for signal in THROTTLE_SIGNALS):
+            self.report_throttled()
+            return True
+        return False
+
+
+class ThrottleSignalLogger:
+    """
+    yt-dlp 日志接收器：ignoreerrors 模式下错误不会抛出，从日志中识别限流信号
+    """
+    def __init__(self, limiter: AdaptiveRateLimiter = None, credentials: CredentialPool = None,
+                 identity: Identity = None):
+        self.limiter = limiter
+        self.credentials = credentials
+        self.identity = identity
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def _check(self, msg):
+        # 限流信号同时降低全局速率并让当前身份进入冷却
+        if self.limiter and self.limiter.check_message(msg) and self.credentials:
+            self.credentials.report_error(self.identity, throttled=True)
+
+    def warning(self, msg):
+        self._check(msg)
+
+    def error(self, msg):
+        self._check(msg)
+
+
+def create_http_session(pool_size: int = THUMBNAIL_WORKERS) -> requests.Session:
+    """
+    创建带连接池的 HTTP 会话，复用到 i.ytimg.com 的长连接
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class ThumbnailStore:
+    """
+    按 video_id 和分辨率寻址的缩略图存储
+
+    文件按 video_id 前两位分片存放，索引文件记录每个缩略图的路径和内容哈希，
+    已下载过的缩略图直接命中索引，内容相同的图片只保留一份。
+    """
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.index_file = os.path.join(root_dir, 'index.jsonl')
+        self._entries = {}  # "video_id/resolution" -> 相对路径
+        self._hashes = {}  # sha256 -> 相对路径
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """
+        读取索引文件，忽略写入中断导致的残缺行
+        """
+        if not os.path.exists(self.index_file):
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries[entry['key']] = entry['path']
+                self._hashes.setdefault(entry['sha256'], entry['path'])
+
+    @staticmethod
+    def _key(video_id: str, resolution: str) -> str:
+        return f"{video_id}/{resolution}"
+
+    def lookup(self, video_id: str, resolution: str) -> str:
+        """
+        返回已存储缩略图的路径，不存在时返回空字符串
+        """
+        with self._lock:
+            rel_path = self._entries.get(self._key(video_id, resolution))
+        if rel_path:
+            path = os.path.join(self.root_dir, rel_path)
+            if os.path.exists(path):
+                return path
+        return ''
+
+    def _file_path(self, video_id: str, resolution: str) -> str:
+        shard_dir = os.path.join(self.root_dir, video_id[:2] or '_')
+        os.makedirs(shard_dir, exist_ok=True)
+        return os.path.join(shard_dir, f"{video_id}_{resolution}.jpg")
+
+    def temp_path(self, video_id: str, resolution: str) -> str:
+        """
+        返回下载过程中使用的临时文件路径，按线程区分以免并发下载互相覆盖
+        """
+        return f"{self._file_path(video_id, resolution)}.{threading.get_ident()}.part"
+
+    def add(self, video_id: str, resolution: str, temp_path: str, digest: str) -> str:
+        """
+        将下载完成的临时文件加入存储；内容重复时删除新文件并复用已有文件
+        """
+        with self._lock:
+            rel_path = self._hashes.get(digest)
+            if rel_path and os.path.exists(os.path.join(self.root_dir, rel_path)):
+                os.remove(temp_path)
+            else:
+                final_path = self._file_path(video_id, resolution)
+                os.replace(temp_path, final_path)
+                rel_path = os.path.relpath(final_path, self.root_dir)
+                self._hashes[digest] = rel_path
+            
+            key = self._key(video_id, resolution)
+            self._entries[key] = rel_path
+            # 追加写入索引，单行写入即使中断也不会破坏已有记录
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'path': rel_path, 'sha256': digest}) + '\n')
+        return os.path.join(self.root_dir, rel_path)
+
+
+class MetadataCache:
+    """
+    基于 SQLite 的 yt-dlp 视频元数据缓存，以 video_id 为键
+
+    不变字段（标题、描述、发布日期等）和统计字段（播放量、点赞数）分别记录
+    更新时间，使用不同的有效期；超过容量时按最近访问时间淘汰。
+    """
+    STATIC_FIELDS = ('id', 'title', 'description', 'upload_date', 'uploader', 'duration')
+    STATS_FIELDS = ('view_count', 'like_count')
+
+    def __init__(self, db_path: str, static_ttl: int = METADATA_STATIC_TTL,
+                 stats_ttl: int = METADATA_STATS_TTL, max_entries: int = METADATA_CACHE_MAX_ENTRIES):
+        self.static_ttl = static_ttl
+        self.stats_ttl = stats_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS video_metadata (
+                video_id TEXT PRIMARY KEY,
+                static_json TEXT NOT NULL,
+                stats_json TEXT NOT NULL,
+                static_at REAL NOT NULL,
+                stats_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_video_metadata_accessed ON video_metadata (accessed_at)'
+        )
+        self._conn.commit()
+
+    def get(self, video_id: str) -> Dict:
+        """
+        返回缓存的视频信息；不变字段过期时返回 None，统计字段过期时不包含统计字段
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT static_json, stats_json, static_at, stats_at FROM video_metadata WHERE video_id = ?',
+                (video_id,)
+            ).fetchone()
+            if not row:
+                return None
+            static_json, stats_json, static_at, stats_at = row
+            if now - static_at > self.static_ttl:
+                return None
+            self._conn.execute(
+                'UPDATE video_metadata SET accessed_at = ? WHERE video_id = ?', (now, video_id)
+            )
+            self._conn.commit()
+        
+        info = json.loads(static_json)
+        if now - stats_at <= self.stats_ttl:
+            info.update(json.loads(stats_json))
+        return info
+
+    def put(self, info: Dict):
+        """
+        写入或更新一条完整的视频信息
+        """
+        video_id = info.get('id')
+        if not video_id:
+            return
+        static = {field: info.get(field) for field in self.STATIC_FIELDS}
+        # 只保留最后一个（通常分辨率最高的）缩略图链接
+        thumbnails = info.get('thumbnails') or []
+        if thumbnails:
+            static['thumbnails'] = [{'url': thumbnails[-1].get('url', '')}]
+        stats = {field: info.get(field) for field in self.STATS_FIELDS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO video_metadata VALUES (?, ?, ?, ?, ?, ?)',
+                (video_id, json.dumps(static, ensure_ascii=False), json.dumps(stats), now, now, now)
+            )
+            self._puts_since_evict += 1
+            # 每写入一批再检查容量，避免每次写入都统计行数
+            if self._puts_since_evict >= 1000:
+                self._evict()
+                self._puts_since_evict = 0
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        删除最久未访问的记录，使缓存数量不超过上限
+        """
+        count = self._conn.execute('SELECT COUNT(*) FROM video_metadata').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM video_metadata WHERE video_id IN '
+                '(SELECT video_id FROM video_metadata ORDER BY accessed_at LIMIT ?)',
+                (excess,)
+            )
+
+
+class SeenVideoIndex:
+    """
+    已爬取视频的持久化索引，基于 SQLite，以 video_id 为键，跨次运行去重
+
+    启动时将全部视频 ID 及其统计字段的获取时间载入内存，查询不访问数据库；
+    爬取结束后批量写入本次获取到的视频。
+    """
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_videos (
+                video_id TEXT PRIMARY KEY,
+                first_seen REAL NOT NULL,
+                stats_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._stats_at = dict(self._conn.execute('SELECT video_id, stats_at FROM seen_videos'))
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._stats_at
+
+    def __len__(self):
+        return len(self._stats_at)
+
+    def skip_ids(self, refresh_after: float = None) -> set:
+        """
+        返回增量模式下应跳过的视频 ID；指定 refresh_after（秒）时，统计字段过期的视频不跳过
+        """
+        if refresh_after is None:
+            return set(self._stats_at)
+        cutoff = time.time() - refresh_after
+        return {video_id for video_id, stats_at in self._stats_at.items() if stats_at >= cutoff}
+
+    def mark(self, video_ids):
+        """
+        记录本次获取到的视频，已有记录只更新统计字段的获取时间
+        """
+        now = time.time()
+        rows = [(video_id, now, now) for video_id in video_ids]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO seen_videos VALUES (?, ?, ?) '
+                'ON CONFLICT(video_id) DO UPDATE SET stats_at = excluded.stats_at',
+                rows
+            )
+            self._conn.commit()
+            for video_id, _, stats_at in rows:
+                self._stats_at[video_id] = stats_at
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def merge_search_hits(video: Dict, other: Dict):
+    """
+    将 other 中的类别、关键词和语言合并到 video 中，去重并保持首次出现的顺序
+
+    各字段合并为以 HIT_SEPARATOR 分隔的字符串，search_hits 保留每次命中的 [类别, 关键词, 语言]。
+    """
+    for field in SEARCH_HIT_FIELDS:
+        values = video[field].split(HIT_SEPARATOR) if video.get(field) else []
+        for value in (other[field].split(HIT_SEPARATOR) if other.get(field) else []):
+            if value not in values:
+                values.append(value)
+        video[field] = HIT_SEPARATOR.join(values)
+    
+    hits = video.setdefault('search_hits', [])
+    for hit in other.get('search_hits') or [[other.get(field) or '' for field in SEARCH_HIT_FIELDS]]:
+        if any(hit) and list(hit) not in hits:
+            hits.append(list(hit))
+
+
+def build_ydl_options() -> Dict:
+    """
+    构建 yt-dlp 基础配置，cookies 文件由身份池按身份设置
+    """
+    return {
+        'quiet': True,
+        'no_warnings': True,
+        # 搜索只返回视频列表，完整信息按视频单独提取，以便使用元数据缓存
+        'extract_flat': 'in_playlist',
+        'no_check_certificates': True,
+        'ignoreerrors': True,
+    }
+
+
+def default_cookie_files() -> List[str]:
+    """
+    返回脚本目录下的默认 cookies 文件，不存在时给出警告
+    """
+    # 检查cookies文件
+    cookies_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), COOKIES_FILE)
+    if os.path.exists(cookies_path):
+        return [cookies_path]
+    logger.warning("警告：未找到cookies文件，这可能会影响搜索结果")
+    return []
+
+
+class Identity:
+    """
+    一个访问身份（cookies 文件）及其健康状态，api_key 只作为附带信息保存
+    """
+    __slots__ = ('name', 'cookiefile', 'api_key', 'in_flight', 'requests', 'errors',
+                 'consecutive_errors', 'throttled', 'cooldown', 'cooldown_until')
+
+    def __init__(self, name: str, cookiefile: str = None, api_key: str = None):
+        self.name = name
+        self.cookiefile = cookiefile
+        self.api_key = api_key
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.throttled = 0
+        self.cooldown = IDENTITY_COOLDOWN
+        self.cooldown_until = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class CredentialPool:
+    """
+    多身份轮换池
+
+    每次借出当前负载最低（进行中的请求最少，其次错误率最低）的健康身份；
+    身份被限流或连续出错后进入冷却，冷却期间不再分配，冷却时间逐次加倍。
+    所有身份都在冷却时，等待最早结束冷却的身份。
+    """
+    def __init__(self, identities: List[Identity]):
+        self.identities = identities or [Identity('default')]
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_credentials(cls, cookie_files: List[str] = None, api_keys: List[str] = None) -> 'CredentialPool':
+        """
+        每个 cookies 文件成为一个身份，API 密钥按顺序附在身份上
+
+        yt-dlp 不使用 API 密钥，只有 cookies 文件会让请求以不同的身份发出，
+        因此 API 密钥不单独成为身份，也不参与速率放大；没有 cookies 文件时只有一个默认身份。
+        """
+        cookie_files = list(cookie_files or [])
+        api_keys = list(api_keys or [])
+        identities = [
+            Identity(os.path.basename(cookiefile), cookiefile, api_keys[i] if i < len(api_keys) else None)
+            for i, cookiefile in enumerate(cookie_files)
+        ] or [Identity('default', api_key=api_keys[0] if api_keys else None)]
+        if len(api_keys) > len(identities):
+            logger.warning(f"API 密钥数量（{len(api_keys)}）多于 cookies 文件数量（{len(cookie_files)}），"
+                           f"多出的密钥不会作为独立身份使用")
+        return cls(identities)
+
+    def __len__(self):
+        return len(self.identities)
+
+    def acquire(self) -> Identity:
+        """
+        借出一个健康身份，使用完毕后必须调用 release
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                healthy = [identity for identity in self.identities if identity.cooldown_until <= now]
+                if healthy:
+                    identity = min(healthy, key=lambda item: (item.in_flight, item.error_rate, item.requests))
+                    identity.in_flight += 1
+                    return identity
+                wait = min(identity.cooldown_until for identity in self.identities) - now
+                logger.warning(f"所有身份都在冷却中，等待 {wait:.0f} 秒")
+                self._condition.wait(timeout=wait)
+
+    def release(self, identity: Identity):
+        with self._condition:
+            identity.in_flight -= 1
+            self._condition.notify()
+
+    def report_success(self, identity: Identity):
+        with self._condition:
+            identity.requests += 1
+            identity.consecutive_errors = 0
+            identity.cooldown = IDENTITY_COOLDOWN
+
+    def report_error(self, identity: Identity, throttled: bool = False):
+        """
+        记录一次错误；被限流或连续出错过多时让该身份进入冷却
+
+        身份已在冷却中时只记录错误，同一次限流中并发收到的多个错误不会重复延长和加倍冷却时间。
+        """
+        with self._condition:
+            identity.requests += 1
+            identity.errors += 1
+            identity.consecutive_errors += 1
+            if throttled:
+                identity.throttled += 1
+            if identity.cooldown_until > time.monotonic():
+                return
+            if throttled or identity.consecutive_errors >= IDENTITY_MAX_ERRORS:
+                identity.cooldown_until = time.monotonic() + identity.cooldown
+                logger.warning(f"身份 {identity.name} 暂停使用 {identity.cooldown} 秒",
+                               extra=log_fields('identity_cooldown', identity=identity.name,
+                                                cooldown=identity.cooldown, throttled=throttled))
+                identity.cooldown = min(identity.cooldown * 2, MAX_IDENTITY_COOLDOWN)
+                identity.consecutive_errors = 0
+
+    def summary(self) -> str:
+        """
+        返回各身份的请求数、错误数和限流次数
+        """
+        with self._condition:
+            return '\n'.join(
+                f"身份 {identity.name}: 请求 {identity.requests}，错误 {identity.errors}，限流 {identity.throttled}"
+                for identity in self.identities
+            )
+
+
+class YoutubeDLPool:
+    """
+    线程安全的 YoutubeDL 实例池
+
+    YoutubeDL 实例本身不是线程安全的，每个工作线程借用一个独占实例，用完归还。
+    实例在整个爬取过程中保留，cookies 只在创建实例时加载一次，
+    HTTP 连接、提取器缓存（如播放器和 JS 解析结果）在各次搜索之间复用。
+    每个实例绑定身份池中的一个身份，借用时由身份池选择负载最低的健康身份。
+    """
+    def __init__(self, ydl_opts: Dict = None, credentials: CredentialPool = None,
+                 limiter: AdaptiveRateLimiter = None, factory=None):
+        self.ydl_opts = ydl_opts if ydl_opts is not None else build_ydl_options()
+        # 创建实例的工厂函数，默认为 yt_dlp.YoutubeDL，基准测试中替换为本地模拟提取器
+        self.factory = factory
+        self.credentials = credentials or CredentialPool([])
+        self.limiter = limiter
+        self._idle = {}  # id(身份) -> 空闲实例列表
+        self._all = []
+        self._owners = {}  # id(实例) -> 身份
+        self._lock = threading.Lock()
+
+    def _create(self, identity: Identity):
+        ydl_opts = dict(self.ydl_opts)
+        if identity.cookiefile:
+            ydl_opts['cookiefile'] = identity.cookiefile
+        ydl_opts['logger'] = ThrottleSignalLogger(self.limiter, self.credentials, identity)
+        ydl = (self.factory or yt_dlp.YoutubeDL)(ydl_opts)
+        with self._lock:
+            self._all.append(ydl)
+            self._owners[id(ydl)] = identity
+        return ydl
+
+    @contextmanager
+    def borrow(self):
+        """
+        为负载最低的健康身份借用一个空闲实例，没有空闲实例时新建一个；退出时归还
+        """
+        identity = self.credentials.acquire()
+        try:
+            with self._lock:
+                idle = self._idle.setdefault(id(identity), [])
+                ydl = idle.pop() if idle else None
+            if ydl is None:
+                ydl = self._create(identity)
+            try:
+                yield ydl
+            finally:
+                with self._lock:
+                    self._idle[id(identity)].append(ydl)
+        finally:
+            self.credentials.release(identity)
+
+    def report_success(self, ydl):
+        self.credentials.report_success(self._owners[id(ydl)])
+
+    def report_error(self, ydl, message) -> bool:
+        """
+        记录实例所属身份的一次错误，返回是否为限流信号
+        """
+        throttled = self.limiter.check_message(message) if self.limiter else False
+        self.credentials.report_error(self._owners[id(ydl)], throttled)
+        return throttled
+
+    def close(self):
+        """
+        关闭所有实例，释放网络连接和 cookies 文件
+        """
+        with self._lock:
+            instances, self._all, self._idle, self._owners = self._all, [], {}, {}
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.warning(f"关闭 YoutubeDL 实例时出错: {e}")
+
+
+class CrawlCheckpoint:
+    """
+    爬取进度检查点，记录已完成的搜索任务及其获取到的视频
+
+    进度定期整体写入临时文件后原子替换，进程中断时最多丢失一个写入间隔内的进度。
+    """
+    def __init__(self, path: str, interval: int = CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._tasks = {}  # 任务 -> 视频 ID 列表
+        self._videos = {}  # 视频 ID -> 视频记录
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+    def load(self) -> bool:
+        """
+        读取已有的进度文件，返回是否读取成功
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取进度文件失败: {e}")
+            return False
+        
+        with self._lock:
+            self._videos = data.get('videos', {})
+            self._tasks = {
+                tuple(item['task']): item['video_ids'] for item in data.get('completed_tasks', [])
+            }
+        logger.info(f"已读取进度：完成任务 {len(self._tasks)} 个，视频 {len(self._videos)} 个")
+        return True
+
+    def reset(self):
+        """
+        清空进度，重新开始爬取
+        """
+        with self._lock:
+            self._tasks = {}
+            self._videos = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def completed_tasks(self) -> set:
+        with self._lock:
+            return set(self._tasks)
+
+    def get_videos(self, task: tuple) -> List[Dict]:
+        """
+        返回已完成任务获取到的视频
+        """
+        with self._lock:
+            return [self._videos[video_id] for video_id in self._tasks.get(task, []) if video_id in self._videos]
+
+    def record(self, task: tuple, videos: List[Dict]):
+        """
+        记录一个已完成的任务，距离上次写入超过间隔时写入进度文件
+        """
+        with self._lock:
+            self._tasks[task] = [video['video_id'] for video in videos]
+            for video in videos:
+                self._videos[video['video_id']] = video
+            due = time.monotonic() - self._last_save >= self.interval
+        if due:
+            self.save()
+
+    def save(self):
+        """
+        将进度写入临时文件后原子替换进度文件
+
+        视频记录与其他线程共享，写入前在锁内复制一份，序列化时不受其他线程修改的影响。
+        """
+        with self._lock:
+            data = {
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'completed_tasks': [
+                    {'task': list(task), 'video_ids': list(video_ids)} for task, video_ids in self._tasks.items()
+                ],
+                'videos': {
+                    video_id: dict(video, search_hits=list(video.get('search_hits', [])))
+                    for video_id, video in self._videos.items()
+                }
+            }
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"保存进度文件失败: {e}")
+            self._last_save = time.monotonic()
+
+
+def to_csv_row(result: Dict) -> Dict:
+    """
+    将视频结果转换为以中文列名为键的 CSV 行
+    """
+    # 获取维度得分
+    dimension_scores = result.get('dimension_scores', {})
+    
+    return {
+        '标题': result['title'],
+        '描述': result['description'],
+        '发布时间': result['published_at'],
+        '视频ID': result['video_id'],
+        '频道名称': result['channel_title'],
+        '缩略图文件名': os.path.basename(result['thumbnail_path']) if result['thumbnail_path'] else '',
+        '分类': result['category'],
+        '搜索关键词': result['search_keyword'],
+        '视频链接': result['video_link'],
+        '视频时长(秒)': result['duration'],
+        '搜索语言': result['search_language'],
+        '总评分': result.get('total_score', 0),
+        'AI技术得分': dimension_scores.get('AI技术', 0),
+        '云计算得分': dimension_scores.get('云计算', 0),
+        '数字化得分': dimension_scores.get('数字化', 0),
+        '创新得分': dimension_scores.get('创新', 0),
+        '解决方案得分': dimension_scores.get('解决方案', 0)
+    }
+
+
+def parquet_table(rows: List[Dict]):
+    """
+    按固定的列类型将 CSV 行转换为 pyarrow 表：评分为 float64，时长为 int64，其余为字符串
+
+    列类型不依赖第一批数据，未评分记录的 0 和已评分记录的小数可以写入同一个文件。
+    """
+    import pyarrow as pa
+    
+    types = {}
+    for name in CSV_FIELDNAMES:
+        if name == '总评分' or name.endswith('得分'):
+            types[name] = (pa.float64(), lambda value: float(value or 0))
+        elif name == '视频时长(秒)':
+            types[name] = (pa.int64(), lambda value: int(float(value or 0)))
+        else:
+            types[name] = (pa.string(), lambda value: '' if value is None else str(value))
+    schema = pa.schema([(name, field_type) for name, (field_type, _) in types.items()])
+    columns = {name: [convert(row.get(name)) for row in rows] for name, (_, convert) in types.items()}
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+class ResultSink:
+    """
+    流式结果输出，每条通过筛选的记录立即写入 CSV / JSONL / Parquet 文件
+
+    写入按固定条数刷新并同步到磁盘，程序中途失败时已写入的结果不会丢失；
+    爬取结束后由 finalize 按排序结果重写各个输出文件。
+    """
+    def __init__(self, output_dir: str, formats=OUTPUT_FORMATS, flush_every: int = OUTPUT_FLUSH_EVERY):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base_path = os.path.join(output_dir, f'youtube_search_results_{timestamp}')
+        self.flush_every = flush_every
+        self.paths = {}
+        self.count = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._csv_file = None
+        self._csv_writer = None
+        self._jsonl_file = None
+        self._parquet_writer = None
+        self._parquet_rows = []
+        
+        if 'csv' in formats:
+            self.paths['csv'] = f"{base_path}.csv"
+            self._csv_file = open(self.paths['csv'], 'w', newline='', encoding='utf-8-sig')
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDNAMES)
+            self._csv_writer.writeheader()
+        if 'jsonl' in formats:
+            self.paths['jsonl'] = f"{base_path}.jsonl"
+            self._jsonl_file = open(self.paths['jsonl'], 'w', encoding='utf-8')
+        if 'parquet' in formats:
+            try:
+                import pyarrow  # noqa: F401
+                self.paths['parquet'] = f"{base_path}.parquet"
+            except ImportError:
+                logger.warning("警告：未安装 pyarrow，跳过 Parquet 输出")
+
+    def write(self, result: Dict):
+        """
+        写入一条结果，线程安全
+        """
+        try:
+            row = to_csv_row(result)
+        except Exception as e:
+            logger.warning(f"保存单条结果时出错: {e}")
+            return
+        
+        with self._lock:
+            if self._csv_writer:
+                self._csv_writer.writerow(row)
+            if self._jsonl_file:
+                self._jsonl_file.write(json.dumps(result, ensure_ascii=False) + '\n')
+            if 'parquet' in self.paths:
+                self._parquet_rows.append(row)
+            self.count += 1
+            METRICS.inc('records_written_total', len(self.paths), format='stream')
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        """
+        刷新缓冲区并同步到磁盘，Parquet 按批写入一个行组
+        """
+        for f in (self._csv_file, self._jsonl_file):
+            if f:
+                f.flush()
+                os.fsync(f.fileno())
+        if self._parquet_rows:
+            import pyarrow.parquet as pq
+            table = parquet_table(self._parquet_rows)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.paths['parquet'], table.schema)
+            self._parquet_writer.write_table(table)
+            self._parquet_rows = []
+        self._pending = 0
+
+    def close(self):
+        """
+        写出剩余数据并关闭所有文件
+        """
+        with self._lock:
+            self._flush()
+            for f in (self._csv_file, self._jsonl_file):
+                if f:
+                    f.close()
+            if self._parquet_writer:
+                self._parquet_writer.close()
+
+    def finalize(self, ranked: List[Dict]):
+        """
+        按排序结果重写 CSV、JSONL 和 Parquet 文件，每个视频一行，未参与排序的记录排在最后
+
+        流式写入时视频可能还未被其他搜索命中，重写时使用合并了全部命中的最终记录；
+        ranked 中没有被流式写入的记录也会补充写入，ranked 应只包含需要输出的记录。
+        """
+        records = {}
+        for video in ranked:
+            records.setdefault(video['video_id'], video)
+        order = {video_id: position for position, video_id in enumerate(records)}
+        
+        if 'csv' in self.paths:
+            with open(self.paths['csv'], 'r', newline='', encoding='utf-8-sig') as f:
+                rows = self._merge_rows(csv.DictReader(f), records, order)
+            self._replace(self.paths['csv'], rows, 'csv')
+        if 'parquet' in self.paths and (records or os.path.exists(self.paths['parquet'])):
+            import pyarrow.parquet as pq
+            table = pq.read_table(self.paths['parquet']) if os.path.exists(self.paths['parquet']) else None
+            rows = self._merge_rows(table.to_pylist() if table is not None else [], records, order)
+            self._replace(self.paths['parquet'], rows, 'parquet')
+        if 'jsonl' in self.paths:
+            with open(self.paths['jsonl'], 'r', encoding='utf-8') as f:
+                lines = {}
+                for line in f:
+                    if line.strip():
+                        lines.setdefault(json.loads(line).get('video_id'), line)
+            lines = [
+                json.dumps(records[video_id], ensure_ascii=False) + '\n' if video_id in records else line
+                for video_id, line in lines.items()
+            ] + [
+                json.dumps(record, ensure_ascii=False) + '\n'
+                for video_id, record in records.items() if video_id not in lines
+            ]
+            lines.sort(key=lambda line: order.get(json.loads(line).get('video_id'), len(order)))
+            self._replace(self.paths['jsonl'], lines, 'jsonl')
+
+    @staticmethod
+    def _merge_rows(rows, records: Dict, order: Dict) -> List[Dict]:
+        """
+        每个视频保留一行，参与排序的视频换成最终记录的行，并按排序结果排列；流式文件中缺少的记录补充写入
+        """
+        by_id = {}
+        for row in rows:
+            by_id.setdefault(row['视频ID'], row)
+        merged = [
+            to_csv_row(records[video_id]) if video_id in records else row
+            for video_id, row in by_id.items()
+        ]
+        merged.extend(to_csv_row(record) for video_id, record in records.items() if video_id not in by_id)
+        merged.sort(key=lambda row: order.get(row['视频ID'], len(order)))
+        return merged
+
+    @staticmethod
+    def _replace(path: str, rows: list, fmt: str):
+        """
+        写入临时文件后原子替换原文件
+        """
+        tmp_path = f"{path}.tmp"
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(parquet_table(rows), tmp_path)
+        elif fmt == 'csv':
+            with open(tmp_path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(rows)
+        os.replace(tmp_path, path)
+
+
+class ResultStore:
+    """
+    基于 SQLite（WAL 模式）的结果数据库，跨次运行累积保存爬取结果
+
+    videos 表每个视频一行，video_scores 表保存各维度得分，search_hits 表保存每次搜索命中；
+    按分类、发布时间、总评分和频道建立索引，供 query 子命令按条件查询和导出。
+    """
+    VIDEO_FIELDS = ('video_id', 'title', 'description', 'published_at', 'channel_title', 'thumbnail_path',
+                    'video_link', 'duration', 'view_count', 'like_count', 'total_score')
+
+    def __init__(self, db_path: str, batch_size: int = RESULT_STORE_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL 模式下查询不会被写入阻塞
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                channel_title TEXT NOT NULL,
+                thumbnail_path TEXT NOT NULL,
+                video_link TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                view_count INTEGER NOT NULL,
+                like_count INTEGER NOT NULL,
+                total_score REAL NOT NULL,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS video_scores (
+                video_id TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (video_id, dimension)
+            );
+            CREATE TABLE IF NOT EXISTS search_hits (
+                video_id TEXT NOT NULL,
+                category TEXT NOT NULL,
+                search_keyword TEXT NOT NULL,
+                search_language TEXT NOT NULL,
+                crawled_at REAL NOT NULL,
+                PRIMARY KEY (video_id, category, search_keyword, search_language)
+            );
+            CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at);
+            CREATE INDEX IF NOT EXISTS idx_videos_total_score ON videos (total_score);
+            CREATE INDEX IF NOT EXISTS idx_videos_channel_title ON videos (channel_title);
+            CREATE INDEX IF NOT EXISTS idx_search_hits_category ON search_hits (category, video_id);
+        """)
+        self._conn.commit()
+
+    def upsert(self, records) -> int:
+        """
+        批量写入或更新视频记录，每 batch_size 条一个事务，返回写入的视频数
+        """
+        count = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                count += self._upsert_batch(batch)
+                batch = []
+        if batch:
+            count += self._upsert_batch(batch)
+        return count
+
+    def _upsert_batch(self, records: List[Dict]) -> int:
+        now = time.time()
+        videos, scores, hits = [], [], []
+        for record in records:
+            if not record.get('video_id'):
+                continue
+            videos.append(tuple(
+                record.get(field) or (0 if field in ('duration', 'view_count', 'like_count', 'total_score') else '')
+                for field in self.VIDEO_FIELDS
+            ) + (now, now))
+            scores.extend(
+                (record['video_id'], dimension, score)
+                for dimension, score in (record.get('dimension_scores') or {}).items()
+            )
+            merged = {}
+            merge_search_hits(merged, record)
+            hits.extend((record['video_id'], *hit, now) for hit in merged['search_hits'])
+        
+        placeholders = ', '.join('?' * (len(self.VIDEO_FIELDS) + 2))
+        updates = ', '.join(
+            f"{field} = excluded.{field}" for field in self.VIDEO_FIELDS
+            if field not in ('video_id', 'thumbnail_path')
+        )
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO videos VALUES ({placeholders}) ON CONFLICT(video_id) DO UPDATE SET {updates}, "
+                    "thumbnail_path = CASE WHEN excluded.thumbnail_path != '' "
+                    "THEN excluded.thumbnail_path ELSE videos.thumbnail_path END, "
+                    "updated_at = excluded.updated_at",
+                    videos
+                )
+                self._conn.executemany('INSERT OR REPLACE INTO video_scores VALUES (?, ?, ?)', scores)
+                self._conn.executemany('INSERT OR IGNORE INTO search_hits VALUES (?, ?, ?, ?, ?)', hits)
+        return len(videos)
+
+    def query(self, category: str = None, keyword: str = None, channel: str = None,
+              since: str = None, until: str = None, min_score: float = None,
+              order_by: str = 'total_score', limit: int = None) -> List[Dict]:
+        """
+        按条件查询视频，返回与 JSONL 输出格式相同的记录，按 order_by 降序排列
+
+        since / until 为 YYYY-MM-DD 格式的发布日期范围（包含两端）。
+        """
+        if order_by not in RESULT_QUERY_ORDERS:
+            raise ValueError(f"不支持的排序字段: {order_by}")
+        conditions, params = [], []
+        if category:
+            conditions.append('EXISTS (SELECT 1 FROM search_hits h WHERE h.video_id = v.video_id AND h.category = ?)')
+            params.append(category)
+        if keyword:
+            conditions.append(
+                'EXISTS (SELECT 1 FROM search_hits h WHERE h.video_id = v.video_id AND h.search_keyword = ?)'
+            )
+            params.append(keyword)
+        if channel:
+            conditions.append('v.channel_title = ?')
+            params.append(channel)
+        if since:
+            conditions.append('v.published_at >= ?')
+            params.append(since)
+        if until:
+            conditions.append('v.published_at <= ?')
+            params.append(until)
+        if min_score is not None:
+            conditions.append('v.total_score >= ?')
+            params.append(min_score)
+        
+        sql = f"SELECT {', '.join('v.' + field for field in self.VIDEO_FIELDS)} FROM videos v"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f" ORDER BY v.{order_by} DESC, v.video_id"
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        with self._lock:
+            records = [dict(zip(self.VIDEO_FIELDS, row)) for row in self._conn.execute(sql, params)]
+            self._attach_details(records)
+        return records
+
+    def iter_all(self, chunk_size: int = RESULT_STORE_BATCH_SIZE):
+        """
+        按 video_id 顺序分批读取全部视频，每批 chunk_size 条，不会一次载入整个数据库
+        """
+        last_id = ''
+        fields = ', '.join(self.VIDEO_FIELDS)
+        while True:
+            with self._lock:
+                records = [
+                    dict(zip(self.VIDEO_FIELDS, row)) for row in self._conn.execute(
+                        f"SELECT {fields} FROM videos WHERE video_id > ? ORDER BY video_id LIMIT ?",
+                        (last_id, chunk_size)
+                    )
+                ]
+                self._attach_details(records)
+            if not records:
+                return
+            yield from records
+            last_id = records[-1]['video_id']
+
+    def _attach_details(self, records: List[Dict]):
+        """
+        为查询结果补充各维度得分和合并后的搜索命中
+        """
+        by_id = {}
+        for record in records:
+            record.update({field: '' for field in SEARCH_HIT_FIELDS}, search_hits=[], dimension_scores={})
+            by_id[record['video_id']] = record
+        video_ids = list(by_id)
+        # SQLite 限制单条语句的参数个数，分批查询
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            marks = ', '.join('?' * len(chunk))
+            for video_id, dimension, score in self._conn.execute(
+                f"SELECT video_id, dimension, score FROM video_scores WHERE video_id IN ({marks})", chunk
+            ):
+                by_id[video_id]['dimension_scores'][dimension] = score
+            for video_id, *hit in self._conn.execute(
+                f"SELECT video_id, category, search_keyword, search_language FROM search_hits "
+                f"WHERE video_id IN ({marks}) ORDER BY crawled_at, rowid", chunk
+            ):
+                merge_search_hits(by_id[video_id], dict(zip(SEARCH_HIT_FIELDS, hit), search_hits=[hit]))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class KeywordScorer:
+    """
+    批量关键词评分器
+
+    所有维度的关键词在初始化时编译为组合正则，一批视频的文本拼接后整体扫描，
+    得到 视频 × 关键词 的命中矩阵，再通过矩阵乘法得到各维度得分。
+    评分规则与逐条计算相同：维度得分 = 命中关键词数 / 维度关键词数 × 权重，
+    总分为各维度得分之和，且不超过 1。
+    """
+    # 拼接文本时使用的分隔符，关键词中不会出现该字符，匹配不会跨越两条视频
+    SEPARATOR = '\x00'
+
+    def __init__(self, dimensions: Dict = None):
+        dimensions = dimensions or SCORING_DIMENSIONS
+        self.dimension_names = list(dimensions)
+        keyword_index = {}
+        for dim_data in dimensions.values():
+            for keyword in dim_data['keywords']:
+                keyword_index.setdefault(keyword.lower(), len(keyword_index))
+        self.keywords = list(keyword_index)
+        
+        # 关键词 × 维度 的归属矩阵，以及每个维度的 权重 / 关键词数
+        self.membership = np.zeros((len(self.keywords), len(self.dimension_names)))
+        self.dimension_factors = np.zeros(len(self.dimension_names))
+        for j, dim_data in enumerate(dimensions.values()):
+            for keyword in dim_data['keywords']:
+                self.membership[keyword_index[keyword.lower()], j] = 1
+            self.dimension_factors[j] = dim_data['weight'] / len(dim_data['keywords'])
+        
+        self.patterns = self._compile(self.keywords)
+        self._keyword_index = keyword_index
+
+    @staticmethod
+    def _can_overlap(a: str, b: str) -> bool:
+        """
+        判断两个关键词在文本中的出现位置是否可能重叠
+        """
+        if a in b or b in a:
+            return True
+        return any(a.endswith(b[:i]) or b.endswith(a[:i]) for i in range(1, min(len(a), len(b))))
+
+    @classmethod
+    def _compile(cls, keywords: List[str]) -> List:
+        """
+        将关键词编译为尽量少的组合正则
+
+        正则匹配不会重叠，可能互相重叠的关键词（如 人工智能 与 智能化）被分到不同的正则中，
+        保证每个关键词是否出现的判断与逐个子串查找一致。
+        """
+        groups = []
+        for keyword in sorted(keywords, key=len, reverse=True):
+            for group in groups:
+                if not any(cls._can_overlap(keyword, other) for other in group):
+                    group.append(keyword)
+                    break
+            else:
+                groups.append([keyword])
+        return [re.compile('|'.join(re.escape(keyword) for keyword in group)) for group in groups]
+
+    def match_matrix(self, texts: List[str]) -> np.ndarray:
+        """
+        返回 文本 × 关键词 的布尔命中矩阵
+        """
+        texts = [text.lower() for text in texts]
+        matrix = np.zeros((len(texts), len(self.keywords)), dtype=bool)
+        if not texts:
+            return matrix
+        
+        # 每条文本在拼接文本中的起始位置
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        joined = self.SEPARATOR.join(texts)
+        
+        for pattern in self.patterns:
+            positions = []
+            keyword_ids = []
+            for match in pattern.finditer(joined):
+                positions.append(match.start())
+                keyword_ids.append(self._keyword_index[match.group()])
+            if positions:
+                rows = np.searchsorted(starts, positions, side='right') - 1
+                matrix[rows, keyword_ids] = True
+        return matrix
+
+    def score_texts(self, texts: List[str]) -> tuple:
+        """
+        对一批文本评分，返回 (文本 × 维度 的得分矩阵, 总分数组)
+        """
+        counts = self.match_matrix(texts).astype(np.float64) @ self.membership
+        dimension_scores = np.round(counts * self.dimension_factors, 3)
+        totals = np.round(np.minimum(dimension_scores.sum(axis=1), 1), 3)
+        return dimension_scores, totals
+
+    def score_videos(self, videos: List[Dict]) -> tuple:
+        """
+        对一批视频的 标题 + 描述 评分，返回 (视频 × 维度 的得分矩阵, 总分数组)
+        """
+        texts = [
+            (video.get('title', '') or '') + ' ' + (video.get('description', '') or '')
+            for video in videos
+        ]
+        return self.score_texts(texts)
+
+
+class RankingIndex:
+    """
+    视频排序使用的稀疏特征索引
+
+    每个视频的分词词频经特征哈希存为 CSR 稀疏矩阵，按当前语料的文档频率计算 TF-IDF，
+    使用余弦相似度查找近邻：语料较小时精确计算，较大时使用随机超平面 LSH 近似查找。
+    索引可保存到磁盘，之后的爬取只需加入新视频，无需重新构建。
+    """
+    def __init__(self, n_features: int = RANK_HASH_FEATURES, n_tables: int = RANK_LSH_TABLES,
+                 n_bits: int = RANK_LSH_BITS, seed: int = 0):
+        self.n_features = n_features
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.video_ids = []
+        self._rows = {}
+        self.counts = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.signatures = np.zeros((0, n_tables), dtype=np.int64)
+        self._signature_size = 0  # 上次整体计算签名时的语料规模
+        self._init_projection()
+
+    def _init_projection(self):
+        """
+        由随机种子生成随机超平面，不随索引保存
+
+        超平面在折叠到 RANK_PROJECTION_DIM 维的特征空间中取稠密的 ±1 值，
+        避免在高维哈希空间中保存稠密矩阵。
+        """
+        rng = np.random.default_rng(self.seed)
+        self._fold = sparse.csr_matrix(
+            (np.ones(self.n_features, dtype=np.float32),
+             np.arange(self.n_features) % RANK_PROJECTION_DIM,
+             np.arange(self.n_features + 1)),
+            shape=(self.n_features, RANK_PROJECTION_DIM)
+        )
+        self._projection = rng.choice(
+            np.array([-1.0, 1.0], dtype=np.float32), (RANK_PROJECTION_DIM, self.n_tables * self.n_bits)
+        )
+        self._buckets = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_projection', None)
+        state.pop('_fold', None)
+        state.pop('_buckets', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_projection()
+
+    @classmethod
+    def load(cls, path: str) -> 'RankingIndex':
+        """
+        读取已保存的索引，文件不存在或损坏时返回空索引
+        """
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    state = pickle.load(f)
+                index = cls.__new__(cls)
+                index.__setstate__(state)
+                return index
+            except Exception as e:
+                logger.warning(f"读取排序索引失败，将重新构建: {e}")
+        return cls()
+
+    def save(self, path: str):
+        """
+        写入临时文件后原子替换索引文件
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            # 只保存数组和基本类型，不依赖类所在的模块名
+            pickle.dump(self.__getstate__(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self.video_ids)
+
+    def row(self, video_id: str) -> int:
+        return self._rows[video_id]
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._rows
+
+    def hash_counts(self, term_freqs: List[Dict]) -> sparse.csr_matrix:
+        """
+        将词频字典哈希为 CSR 词频矩阵；使用 crc32 保证不同运行之间哈希稳定
+        """
+        indptr = [0]
+        indices = []
+        data = []
+        for term_freq in term_freqs:
+            for term, count in term_freq.items():
+                indices.append(zlib.crc32(term.encode('utf-8')) % self.n_features)
+                data.append(count)
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(len(term_freqs), self.n_features)
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def add(self, video_ids: List[str], term_freqs: List[Dict]):
+        """
+        加入尚未索引的视频；语料规模翻倍后按新的文档频率重新计算全部签名
+        """
+        new_items = {}
+        for video_id, term_freq in zip(video_ids, term_freqs):
+            if video_id not in self._rows and video_id not in new_items:
+                new_items[video_id] = term_freq
+        if not new_items:
+            return
+        
+        new_counts = self.hash_counts(list(new_items.values()))
+        start = len(self.video_ids)
+        for offset, video_id in enumerate(new_items):
+            self._rows[video_id] = start + offset
+            self.video_ids.append(video_id)
+        self.counts = sparse.vstack([self.counts, new_counts], format='csr')
+        self.doc_freq += np.bincount(new_counts.indices, minlength=self.n_features)
+        
+        if len(self) > 2 * self._signature_size:
+            self.signatures = self._lsh_keys(self.tfidf())
+            self._signature_size = len(self)
+        else:
+            self.signatures = np.vstack([self.signatures, self._lsh_keys(self.tfidf(range(start, len(self))))])
+        self._buckets = None
+
+    def _idf(self) -> np.ndarray:
+        n = len(self)
+        return (np.log((1 + n) / (1 + self.doc_freq)) + 1).astype(np.float32)
+
+    def _weight(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        """
+        词频乘以 IDF 后按行做 L2 归一化
+        """
+        weighted = sparse.csr_matrix(counts.multiply(self._idf()))
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+
+    def tfidf(self, rows=None) -> sparse.csr_matrix:
+        """
+        返回指定行（默认全部）的 TF-IDF 矩阵，每行已归一化
+        """
+        counts = self.counts if rows is None else self.counts[list(rows)]
+        return self._weight(counts)
+
+    def vectorize(self, term_freqs: List[Dict]) -> sparse.csr_matrix:
+        """
+        将不在索引中的文本（如搜索关键词）转换为同一空间的 TF-IDF 向量
+        """
+        return self._weight(self.hash_counts(term_freqs))
+
+    def _lsh_keys(self, matrix: sparse.csr_matrix) -> np.ndarray:
+        """
+        计算每行在各个哈希表中的签名
+        """
+        bits = np.asarray((matrix @ self._fold) @ self._projection) > 0
+        bits = bits.reshape(matrix.shape[0], self.n_tables, self.n_bits)
+        return bits @ (1 << np.arange(self.n_bits, dtype=np.int64))
+
+    def _candidates(self, row: int) -> np.ndarray:
+        """
+        返回与指定行至少在一个哈希表中同桶的其他行
+        """
+        if self._buckets is None:
+            self._buckets = [{} for _ in range(self.n_tables)]
+            for i, keys in enumerate(self.signatures):
+                for table, key in enumerate(keys):
+                    self._buckets[table].setdefault(key, []).append(i)
+        candidates = set()
+        for table, key in enumerate(self.signatures[row]):
+            candidates.update(self._buckets[table].get(key, ()))
+            if len(candidates) > RANK_MAX_CANDIDATES:
+                break
+        candidates.discard(row)
+        return np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+
+    def neighbor_similarity(self, rows: List[int], k: int = RANK_NEIGHBORS) -> np.ndarray:
+        """
+        返回每行与其 k 个最相似视频的平均余弦相似度，语料中只有一个视频时为 0
+        """
+        result = np.zeros(len(rows))
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return result
+        
+        matrix = self.tfidf()
+        if len(self) <= RANK_EXACT_LIMIT:
+            # 精确计算：分块求相似度矩阵并取前 k 个
+            for chunk_start in range(0, len(rows), 1000):
+                chunk = rows[chunk_start:chunk_start + 1000]
+                sims = (matrix[chunk] @ matrix.T).toarray()
+                sims[np.arange(len(chunk)), chunk] = -np.inf
+                top = np.partition(sims, -k, axis=1)[:, -k:]
+                result[chunk_start:chunk_start + len(chunk)] = top.mean(axis=1)
+            return result
+        
+        # 近似计算：只在同桶的候选视频中查找近邻，每块的 (视频, 候选) 对一次性计算相似度
+        for chunk_start in range(0, len(rows), 1000):
+            chunk = rows[chunk_start:chunk_start + 1000]
+            candidates = [self._candidates(row) for row in chunk]
+            counts = np.array([len(item) for item in candidates])
+            if not counts.any():
+                continue
+            owners = np.repeat(np.arange(len(chunk)), counts)
+            pairs = np.concatenate(candidates)
+            sims = np.asarray(
+                matrix[np.asarray(chunk)[owners]].multiply(matrix[pairs]).sum(axis=1)
+            ).ravel()
+            # 按视频排成 视频 × 候选 的矩阵，候选不足的位置填 -inf
+            padded = np.full((len(chunk), max(counts.max(), k)), -np.inf)
+            padded[owners, np.arange(len(pairs)) - np.repeat(np.cumsum(counts) - counts, counts)] = sims
+            top = np.partition(padded, -k, axis=1)[:, -k:]
+            # 与精确计算一致取平均值；候选不足 k 个时只对找到的近邻求平均
+            found = np.isfinite(top)
+            totals = np.where(found, top, 0.0).sum(axis=1)
+            result[chunk_start:chunk_start + len(chunk)] = totals / np.maximum(found.sum(axis=1), 1)
+        return result
+
+
+class ThumbnailPipeline:
+    """
+    缩略图下载流水线，在后台线程池中下载，下载完成后回填视频记录的缩略图路径
+    """
+    def __init__(self, download_func, max_workers: int = THUMBNAIL_WORKERS):
+        self.download_func = download_func
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._futures = []
+        self._pending = {}  # id(视频记录) -> 未完成的下载任务
+        self._lock = threading.Lock()
+        self._callbacks = 0  # 尚未执行完的 then 回调数
+        self._callbacks_done = threading.Condition(self._lock)
+
+    def submit(self, video_data: Dict, url: str):
+        """
+        提交下载任务，视频记录立即可用，缩略图路径在下载完成后填入
+        """
+        video_data['thumbnail_path'] = ''
+        future = self._executor.submit(self.download_func, url, video_data['video_id'])
+
+        def fill_path(done):
+            video_data['thumbnail_path'] = done.result() or ''
+
+        future.add_done_callback(fill_path)
+        with self._lock:
+            self._futures.append(future)
+            self._pending[id(video_data)] = future
+        future.add_done_callback(lambda done: self._forget(video_data))
+
+    def _forget(self, video_data: Dict):
+        with self._lock:
+            self._pending.pop(id(video_data), None)
+
+    def then(self, video_data: Dict, callback):
+        """
+        缩略图下载完成（路径已回填）后调用 callback(video_data)；没有待下载任务时立即调用
+        """
+        with self._lock:
+            future = self._pending.get(id(video_data))
+            if future is not None:
+                self._callbacks += 1
+        if future is None:
+            callback(video_data)
+            return
+        
+        def run_callback(done):
+            try:
+                callback(video_data)
+            except Exception as e:
+                logger.error(f"缩略图下载完成后处理记录失败: {e}")
+            finally:
+                with self._lock:
+                    self._callbacks -= 1
+                    self._callbacks_done.notify_all()
+        
+        future.add_done_callback(run_callback)
+
+    def wait(self):
+        """
+        等待所有已提交的下载任务及其 then 回调完成
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.exception()
+        # 任务完成后回调才开始执行，需单独等待
+        with self._lock:
+            while self._callbacks:
+                self._callbacks_done.wait()
+
+
+def rank_scores(video_ids: List[str], keywords: List[str], index_path: str, text_of,
+                term_processor: SearchTermProcessor = None, term_freqs: Dict[str, Dict] = None) -> np.ndarray:
+    """
+    计算每个视频的排序得分，返回与 video_ids 对齐的数组
+
+    视频按 标题 + 描述 的分词构建 TF-IDF 稀疏特征，得分为 与搜索关键词的余弦相似度
+    加上 与最相似的若干视频的平均相似度。排序索引保存在 index_path，跨次运行增量更新。
+    text_of(位置) 返回该位置视频的 标题 + 描述，只对尚未索引且不在 term_freqs 中的视频调用；
+    term_freqs 为已在其他进程中提取好的 视频 ID -> 词频。
+    """
+    term_processor = term_processor or SearchTermProcessor()
+    term_freqs = term_freqs or {}
+    
+    index = RankingIndex.load(index_path)
+    
+    # 只对尚未索引的视频分词
+    new_positions = {}
+    for position, video_id in enumerate(video_ids):
+        if video_id not in new_positions and video_id not in index:
+            new_positions[video_id] = position
+    to_tokenize = [video_id for video_id in new_positions if video_id not in term_freqs]
+    tokenized = term_processor.process_many([text_of(new_positions[video_id]) for video_id in to_tokenize])
+    for video_id, (_, term_freq) in zip(to_tokenize, tokenized):
+        term_freqs[video_id] = term_freq
+    index.add(list(new_positions), [term_freqs[video_id] for video_id in new_positions])
+    
+    # 计算每个视频的综合得分
+    unique_ids = list(dict.fromkeys(video_ids))
+    rows = [index.row(video_id) for video_id in unique_ids]
+    query = index.vectorize([term_processor.process_query(' '.join(keywords))[1]])
+    relevance = (index.tfidf(rows) @ query.T).toarray().ravel()
+    density = index.neighbor_similarity(rows)
+    scores = dict(zip(unique_ids, (relevance + density).tolist()))
+    
+    try:
+        index.save(index_path)
+    except OSError as e:
+        logger.warning(f"保存排序索引失败: {e}")
+    return np.fromiter((scores[video_id] for video_id in video_ids), dtype=np.float64, count=len(video_ids))
+
+
+def rank_records(videos: List[Dict], keywords: List[str], index_path: str,
+                 term_processor: SearchTermProcessor = None, term_freqs: Dict[str, Dict] = None) -> List[Dict]:
+    """
+    根据关键词相关度和近邻聚集度对视频进行排序，得分计算见 rank_scores
+    """
+    if not videos:
+        return []
+    scores = rank_scores(
+        [video['video_id'] for video in videos], keywords, index_path,
+        lambda position: f"{videos[position]['title']} {videos[position]['description']}",
+        term_processor, term_freqs
+    )
+    # 根据得分排序，得分相同时保持原有顺序
+    return [videos[position] for position in np.argsort(-scores, kind='stable')]
+
+
+class VideoBatch:
+    """
+    列式存储的一批视频记录
+
+    每个字段一列：标题、描述等文本保存为列表，频道、分类等重复度高的字符串经 sys.intern 驻留，
+    时长、播放量、点赞数和评分保存在 NumPy 数组中，不再为每条视频保存一个字典。
+    排序只产生索引数组，写出时再按索引逐条还原为字典记录。
+    """
+    TEXT_FIELDS = ('title', 'description', 'published_at', 'video_id', 'thumbnail_path', 'video_link')
+    INTERNED_FIELDS = ('channel_title', 'category', 'search_keyword', 'search_language')
+    INT_FIELDS = ('duration', 'view_count', 'like_count')
+    # 还原为字典时的字段顺序，与爬取输出的记录一致
+    RECORD_FIELDS = ('title', 'description', 'published_at', 'video_id', 'channel_title', 'thumbnail_path',
+                     'video_link', 'duration', 'view_count', 'like_count', 'category', 'search_keyword',
+                     'search_language', 'search_hits')
+
+    def __init__(self, columns: Dict, dimension_names=None):
+        self.columns = columns
+        self.dimension_names = list(dimension_names if dimension_names is not None else SCORING_DIMENSIONS)
+
+    @classmethod
+    def from_records(cls, records, dimension_names=None) -> 'VideoBatch':
+        """
+        从字典记录的可迭代对象构建，逐条读取，不要求记录全部在内存中
+        """
+        dimension_names = list(dimension_names if dimension_names is not None else SCORING_DIMENSIONS)
+        columns = {field: [] for field in cls.TEXT_FIELDS + cls.INTERNED_FIELDS}
+        columns['search_hits'] = []
+        numbers = {field: array('q') for field in cls.INT_FIELDS}
+        totals = array('d')
+        dimension_scores = array('d')
+        scored = array('b')  # 记录是否带有评分，未评分的记录还原时不补充评分字段
+        for record in records:
+            for field in cls.TEXT_FIELDS:
+                columns[field].append(record.get(field) or '')
+            for field in cls.INTERNED_FIELDS:
+                columns[field].append(sys.intern(record.get(field) or ''))
+            for field in cls.INT_FIELDS:
+                numbers[field].append(int(record.get(field) or 0))
+            columns['search_hits'].append(record.get('search_hits') or None)
+            scored.append('total_score' in record)
+            totals.append(record.get('total_score') or 0.0)
+            scores = record.get('dimension_scores') or {}
+            dimension_scores.extend(scores.get(name, 0.0) for name in dimension_names)
+        
+        for field in cls.INT_FIELDS:
+            columns[field] = np.frombuffer(numbers[field], dtype=np.int64).copy()
+        columns['scored'] = np.frombuffer(scored, dtype=np.int8).astype(bool)
+        columns['total_score'] = np.frombuffer(totals, dtype=np.float64).copy()
+        columns['dimension_scores'] = np.frombuffer(dimension_scores, dtype=np.float64).copy().reshape(
+            len(totals), len(dimension_names)
+        )
+        return cls(columns, dimension_names)
+
+    @classmethod
+    def concat(cls, batches: List['VideoBatch']) -> 'VideoBatch':
+        if not batches:
+            return cls.from_records([])
+        columns = {}
+        for field, column in batches[0].columns.items():
+            if isinstance(column, list):
+                columns[field] = [value for batch in batches for value in batch.columns[field]]
+            else:
+                columns[field] = np.concatenate([batch.columns[field] for batch in batches])
+        return cls(columns, batches[0].dimension_names)
+
+    def __len__(self):
+        return len(self.columns['video_id'])
+
+    def take(self, indices) -> 'VideoBatch':
+        """
+        按索引数组选取行，返回新的批次；文本列只复制字符串引用
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        columns = {}
+        for field, column in self.columns.items():
+            if isinstance(column, list):
+                columns[field] = [column[position] for position in indices.tolist()]
+            else:
+                columns[field] = column[indices]
+        return VideoBatch(columns, self.dimension_names)
+
+    def texts(self) -> List[str]:
+        """
+        返回每条视频的 标题 + 描述，用于评分和分词
+        """
+        return [f"{title} {description}" for title, description in
+                zip(self.columns['title'], self.columns['description'])]
+
+    def set_scores(self, dimension_scores: np.ndarray, totals: np.ndarray):
+        self.columns['dimension_scores'][:] = dimension_scores
+        self.columns['total_score'][:] = totals
+        self.columns['scored'][:] = True
+
+    def rank_order(self, keywords: List[str], index_path: str, term_processor: SearchTermProcessor = None,
+                   term_freqs: Dict[str, Dict] = None) -> np.ndarray:
+        """
+        返回按排序得分从高到低排列的行索引，得分相同时保持原有顺序
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        titles, descriptions = self.columns['title'], self.columns['description']
+        scores = rank_scores(
+            self.columns['video_id'], keywords, index_path,
+            lambda position: f"{titles[position]} {descriptions[position]}",
+            term_processor, term_freqs
+        )
+        return np.argsort(-scores, kind='stable')
+
+    def record(self, position: int) -> Dict:
+        """
+        将一行还原为字典记录
+        """
+        columns = self.columns
+        record = {}
+        for field in self.RECORD_FIELDS:
+            value = columns[field][position]
+            if field == 'search_hits':
+                value = value or []
+            elif field in self.INT_FIELDS:
+                value = int(value)
+            record[field] = value
+        if columns['scored'][position]:
+            record['total_score'] = float(columns['total_score'][position])
+            record['dimension_scores'] = dict(zip(self.dimension_names,
+                                                  columns['dimension_scores'][position].tolist()))
+        return record
+
+    def iter_records(self, indices=None):
+        """
+        按索引数组（默认为全部行）逐条生成字典记录
+        """
+        positions = range(len(self)) if indices is None else np.asarray(indices).tolist()
+        for position in positions:
+            yield self.record(position)
+
+
+def score_records(videos: List[Dict], scorer: KeywordScorer = None) -> List[Dict]:
+    """
+    批量计算评分并写入每条记录的 total_score 和 dimension_scores
+    """
+    scorer = scorer or KeywordScorer()
+    dimension_scores, totals = scorer.score_videos(videos)
+    for video, scores, total in zip(videos, dimension_scores.tolist(), totals.tolist()):
+        video['total_score'] = total
+        video['dimension_scores'] = dict(zip(scorer.dimension_names, scores))
+    return videos
+
+
+# 重新评分子进程中的评分器和分词器，由 _init_rescore_worker 在每个进程中创建一次
+_rescore_worker = {}
+
+
+def _init_rescore_worker(rank: bool = True):
+    _rescore_worker['scorer'] = KeywordScorer()
+    # 只有需要重新排序时才分词，不排序时不加载 jieba 词典
+    if rank:
+        _rescore_worker['term_processor'] = SearchTermProcessor(preload=True, background=False)
+
+
+def _rescore_chunk(texts: List[str], tokenize: List[int]) -> tuple:
+    """
+    在子进程中对一批 标题 + 描述 文本评分，并对 tokenize 指定位置的文本分词
+
+    返回 (文本 × 维度 的得分矩阵, 总分数组, 词频列表)。
+    """
+    dimension_scores, totals = _rescore_worker['scorer'].score_texts(texts)
+    if not tokenize:
+        return dimension_scores, totals, []
+    term_processor = _rescore_worker['term_processor']
+    term_freqs = [term_processor.process_query(texts[position])[1] for position in tokenize]
+    return dimension_scores, totals, term_freqs
+
+
+def rescore_records(records, keywords: List[str] = None, index_path: str = None,
+                    processes: int = RESCORE_PROCESSES, chunk_size: int = RESCORE_CHUNK_SIZE) -> VideoBatch:
+    """
+    离线重新评分：分块读取记录，在多个进程中并行评分并提取排序特征，合并后按需重新排序
+
+    records 可以是任意可迭代对象（例如 iter_records 的生成器），每块读取后立即转为列式的 VideoBatch，
+    同时在途的任务数不超过进程数的两倍；指定 keywords 和 index_path 时，尚未索引的视频在子进程中分词，
+    返回的批次按排序得分从高到低排列。
+    """
+    scorer = KeywordScorer()
+    rank = bool(keywords and index_path)
+    index = RankingIndex.load(index_path) if rank else None
+    batches = []
+    term_freqs = {}
+    queued = set()  # 已提交分词的视频 ID
+    pending = deque()
+    
+    def collect():
+        batch, chunk_ids, future = pending.popleft()
+        dimension_scores, totals, chunk_term_freqs = future.result()
+        batch.set_scores(dimension_scores, totals)
+        term_freqs.update(zip(chunk_ids, chunk_term_freqs))
+    
+    def chunks():
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    processes = max(1, processes)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_rescore_worker,
+                             initargs=(rank,)) as executor:
+        for chunk in chunks():
+            batch = VideoBatch.from_records(chunk, scorer.dimension_names)
+            del chunk
+            tokenize, chunk_ids = [], []
+            if rank:
+                for position, video_id in enumerate(batch.columns['video_id']):
+                    if video_id not in index and video_id not in queued:
+                        queued.add(video_id)
+                        tokenize.append(position)
+                        chunk_ids.append(video_id)
+            pending.append((batch, chunk_ids, executor.submit(_rescore_chunk, batch.texts(), tokenize)))
+            batches.append(batch)
+            if len(pending) >= processes * 2:
+                collect()
+        while pending:
+            collect()
+    
+    batch = VideoBatch.concat(batches)
+    del batches
+    logger.info(f"已重新评分 {len(batch)} 条记录（{processes} 个进程）")
+    if rank:
+        del index
+        batch = batch.take(batch.rank_order(keywords, index_path, term_freqs=term_freqs))
+    return batch
+
+
+def iter_records(path: str):
+    """
+    逐条读取已保存的视频记录，支持流式输出的 JSONL 文件、search_progress.json 进度文件和结果数据库
+    """
+    if path.endswith('.db'):
+        store = ResultStore(path)
+        try:
+            yield from store.iter_all()
+        finally:
+            store.close()
+    elif path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f).get('videos', {}).values()
 
-# 在文件开头添加cookies文件路径配置
-COOKIES_FILE = 'cookies.txt'  # 将cookies.txt文件放在与脚本相同目录下
 
 class YouTubeCrawler:
-    def __init__(self, api_keys: List[str]):
+    def __init__(self, api_keys: List[str] = None, max_workers: int = MAX_WORKERS,
+                 requests_per_second: float = REQUESTS_PER_SECOND, cookie_files: List[str] = None,
+                 output_dir: str = 'youtube_crawl_results', ydl_factory=None,
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL):
         """
-        初始化YouTube爬虫，支持多个API密钥
+        初始化YouTube爬虫，支持多个 cookies 文件轮换使用
+
+        未指定 cookies 文件时使用脚本目录下的 cookies.txt；
+        ydl_factory 用于替换 yt_dlp.YoutubeDL，例如基准测试中的本地模拟提取器；
+        checkpoint_interval 为写入进度文件的最小间隔（秒）。
         """
-        self.api_keys = api_keys
-        self.current_key_index = 0
-        self.youtube = None
-        self.output_dir = 'youtube_crawl_results'
+        self.api_keys = api_keys or []
+        self.output_dir = output_dir
+        self.checkpoint_interval = checkpoint_interval
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # 身份池：每个身份有独立的健康状态和冷却时间
+        if cookie_files is None:
+            cookie_files = default_cookie_files()
+        self.credentials = CredentialPool.from_credentials(cookie_files, self.api_keys)
+        
+        # 并发搜索的线程数和全局限速器，速率上下限随身份（cookies 文件）数量增加
+        identity_count = len(self.credentials)
+        self.max_workers = max(1, max_workers)
+        self.quota = QuotaTracker(os.path.join(self.output_dir, QUOTA_FILE))
+        self.throttle = AdaptiveRateLimiter(
+            requests_per_second * identity_count,
+            min_rate=MIN_REQUESTS_PER_SECOND * identity_count,
+            max_rate=MAX_REQUESTS_PER_SECOND * identity_count,
+            quota=self.quota
+        )
+        
+        # 所有搜索共用的 YoutubeDL 实例池，每个工作线程借用一个绑定了身份的实例
+        self.ydl_pool = YoutubeDLPool(build_ydl_options(), self.credentials, self.throttle, ydl_factory)
+        
+        # 缩略图使用独立的下载流水线和共享连接池
+        self.http_session = create_http_session()
+        self.thumbnail_store = ThumbnailStore(os.path.join(self.output_dir, THUMBNAIL_DIR))
+        
+        # 关键词评分器，评分维度只编译一次
+        self.scorer = KeywordScorer()
+        # 分词器在后台预加载 jieba 词典，词典缓存放在输出目录中
+        self.term_processor = SearchTermProcessor(preload=True, dict_cache_dir=self.output_dir)
+        
+        # 两阶段搜索：预筛选阶段淘汰的视频 ID 在本次爬取中不再提取
+        self.two_phase_search = TWO_PHASE_SEARCH
+        self._rejected_ids = set()
+        self._rejected_lock = threading.Lock()
+        
+        # 视频元数据缓存，命中时跳过完整的信息提取
+        self.metadata_cache = MetadataCache(os.path.join(self.output_dir, METADATA_CACHE_FILE))
+        
+        # 已爬取视频索引，跨次运行去重；本次爬取中已提取的视频被其他搜索再次命中时直接复用
+        self.seen_index = SeenVideoIndex(os.path.join(self.output_dir, SEEN_INDEX_FILE))
+        self._extracted = {}  # 视频 ID -> 视频记录
+        self._hits_lock = threading.Lock()
+        self.thumbnails = ThumbnailPipeline(self.download_thumbnail)
+        
         # 定义搜索类别（中英文对照）
         self.search_categories = {
             "ICT技术": ["ICT Technology", "Information Technology", "Digital Technology"],
@@ -35,126 +2376,186 @@ class YouTubeCrawler:
             "科技峰会": ["Tech Summit", "Technology Conference", "Innovation Forum"],
             "产品发布会": ["Product Launch", "Product Release", "New Product Announcement"]
         }
-        
-        # 初始化第一个API客户端
-        self._init_youtube_client()
-
-    def _init_youtube_client(self):
-        """
-        初始化YouTube API客户端
-        """
-        # 使用第一个API密钥
-        api_key = self.api_keys[self.current_key_index]
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
 
-    def _switch_api_key(self):
+    def _fetch_thumbnail(self, url: str) -> requests.Response:
         """
-        切换到下一个API密钥
+        通过共享会话以流式方式请求缩略图，失败时抛出异常
         """
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        self.youtube = build('youtube', 'v3', developerKey=self.api_keys[self.current_key_index])
-        return True
+        response = self.http_session.get(url, timeout=10, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response
 
-    def download_thumbnail(self, url: str, video_title: str) -> str:
+    def download_thumbnail(self, url: str, video_id: str) -> str:
         """
-        下载缩略图并返回保存路径，使用视频标题作为文件名
+        下载缩略图并返回保存路径，按 video_id 和分辨率存储，已存在时不再请求网络
         """
-        try:
-            
-            url = url.replace('vi_webp', 'vi')
+        with METRICS.timed('thumbnail'):
+            try:
             
-            # 清理标题，移除不合法的文件名字符
-            safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_title = safe_title[:100]  # 限制文件名长度
+                url = url.replace('vi_webp', 'vi')
             
-            # 生成文件名
-            file_ext = '.jpg'  # 使用固定的jpg扩展名
-            filename = f"{safe_title}{file_ext}"
-            save_path = os.path.join(self.output_dir, filename)
+                # 分辨率取自链接文件名，例如 hqdefault、maxresdefault
+                resolution = os.path.splitext(os.path.basename(urlparse(url).path))[0] or 'default'
             
-            # 如果文件已存在，添加数字后缀
-            base_path = save_path
-            counter = 1
-            while os.path.exists(save_path):
-                name, ext = os.path.splitext(base_path)
-                save_path = f"{name}_{counter}{ext}"
-                counter += 1
+                # 已下载过的缩略图直接返回
+                existing_path = self.thumbnail_store.lookup(video_id, resolution)
+                if existing_path:
+                    METRICS.inc('thumbnails_total', outcome='cached')
+                    return existing_path
             
-            # 如果第一次请求失败，尝试其他格式
-            try:
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-            except:
-                # 尝试不同的缩略图格式
-                video_id = url.split('/')[-2]
-                fallback_formats = [
-                    f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
-                    f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
-                    f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"
-                ]
+                # 如果第一次请求失败，尝试其他格式
+                try:
+                    response = self._fetch_thumbnail(url)
+                except:
+                    # 尝试不同的缩略图格式
+                    fallback_formats = [
+                        f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+                        f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+                        f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"
+                    ]
                 
-                for fallback_url in fallback_formats:
-                    try:
-                        response = requests.get(fallback_url, timeout=10)
-                        response.raise_for_status()
-                        break
-                    except:
-                        continue
-                else:
-                    raise Exception("所有缩略图格式都无法访问")
+                    for fallback_url in fallback_formats:
+                        try:
+                            response = self._fetch_thumbnail(fallback_url)
+                            break
+                        except:
+                            continue
+                    else:
+                        raise Exception("所有缩略图格式都无法访问")
             
-            # 保存图片
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
+                # 分块流式写入临时文件，同时计算内容哈希用于去重
+                temp_path = self.thumbnail_store.temp_path(video_id, resolution)
+                digest = hashlib.sha256()
+                size = 0
+                with response, open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=THUMBNAIL_CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+                METRICS.inc('downloaded_bytes_total', size, stage='thumbnail')
+                METRICS.inc('thumbnails_total', outcome='downloaded')
             
-            return save_path
+                return self.thumbnail_store.add(video_id, resolution, temp_path, digest.hexdigest())
             
-        except Exception as e:
-            print(f"下载缩略图失败 {url}: {e}")
-            return ''
+            except Exception as e:
+                METRICS.inc('thumbnails_total', outcome='failed')
+                logger.warning(f"下载缩略图失败 {url}: {e}",
+                               extra=log_fields('thumbnail_failed', url=url, video_id=video_id, error=str(e)))
+                return ''
 
-    def get_video_info(self, search_term: str) -> List[Dict]:
+    def _extract_video(self, ydl, video_id: str) -> Dict:
         """
-        使用yt-dlp搜索并获取视频信息
+        获取单个视频的完整信息，优先使用元数据缓存
         """
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,  # 改为False以获取完整信息
-            'no_check_certificates': True,
-            'ignoreerrors': True,
-            # 减少延迟时间
-            'sleep_interval': 1,
-            'max_sleep_interval': 2,
-        }
+        info = self.metadata_cache.get(video_id)
+        if info and all(field in info for field in MetadataCache.STATS_FIELDS):
+            METRICS.inc('videos_total', outcome='cached')
+            return info
+        
+        self.throttle.acquire()
+        with METRICS.timed('extract'):
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        if info:
+            self.throttle.report_success()
+            self.ydl_pool.report_success(ydl)
+            self.metadata_cache.put(info)
+        return info
+
+    def _prefilter_flat_entry(self, flat_entry: Dict, current_date: datetime, skip_ids: set) -> bool:
+        """
+        根据轻量搜索结果中已有的字段判断视频是否值得提取完整信息
+        """
+        video_id = flat_entry.get('id')
+        if not video_id or video_id in skip_ids or video_id in self._rejected_ids:
+            return False
         
-        # 修改搜索数量从 ytsearch5 改为 ytsearch2
-        search_url = f"ytsearch2:{search_term}"  # 每个关键词只搜索2个视频
+        # 轻量结果中不一定包含时长和发布日期，缺失时留到完整信息阶段再判断
+        duration = flat_entry.get('duration')
+        if duration and not MIN_DURATION <= duration <= MAX_DURATION:
+            METRICS.inc('videos_total', outcome='skipped_duration')
+            self._reject(video_id)
+            return False
         
-        # 检查cookies文件
-        cookies_path = os.path.join(os.path.dirname(__file__), COOKIES_FILE)
-        if os.path.exists(cookies_path):
-            ydl_opts['cookiefile'] = cookies_path
-        else:
-            print("警告：未找到cookies文件，这可能会影响搜索结果")
+        upload_date = flat_entry.get('upload_date')
+        if upload_date:
+            try:
+                if (current_date - datetime.strptime(upload_date, '%Y%m%d')).days > MAX_VIDEO_AGE_DAYS:
+                    METRICS.inc('videos_total', outcome='skipped_old')
+                    self._reject(video_id)
+                    return False
+            except ValueError:
+                pass
+        return True
+
+    def _reject(self, video_id: str):
+        """
+        记录被淘汰的视频，本次爬取中再次出现时不再处理
+        """
+        with self._rejected_lock:
+            self._rejected_ids.add(video_id)
+
+    def get_video_info(self, search_term: str, max_results: int = SEARCH_RESULTS_PER_QUERY,
+                       skip_ids: set = None) -> List[Dict]:
+        """
+        使用yt-dlp搜索并获取视频信息
+
+        先执行轻量搜索获取视频列表，两阶段模式下按时长、发布日期和已见 ID 预筛选，
+        再对候选视频提取完整信息，最多返回 max_results 个视频。
+        """
+        search_url = f"ytsearch{SEARCH_RESULTS_PER_QUERY}:{search_term}"
+        skip_ids = skip_ids or set()
         
         videos = []
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # 从连接池借用一个长期存在的 YoutubeDL 实例，复用其 HTTP 连接和提取器缓存
+            with self.ydl_pool.borrow() as ydl:
                 try:
-                    results = ydl.extract_info(search_url, download=False)
+                    # 由全局限速器控制请求速率并计入每日配额，替代逐条视频的固定延迟
+                    self.throttle.acquire()
+                    with METRICS.timed('search'):
+                        results = ydl.extract_info(search_url, download=False)
+                    METRICS.inc('searches_total')
                     
                     if not results or 'entries' not in results:
-                        print(f"未找到搜索结果: {search_term}")
+                        logger.info(f"未找到搜索结果: {search_term}")
                         return videos
+                    self.throttle.report_success()
+                    self.ydl_pool.report_success(ydl)
                         
                     # 获取当前时间
                     current_date = datetime.now()
                     
-                    for entry in results['entries']:
+                    # 第一阶段：在轻量搜索结果上预筛选
+                    candidates = [entry for entry in results['entries'] if entry and entry.get('id')]
+                    if skip_ids:
+                        unseen = [entry for entry in candidates if entry['id'] not in skip_ids]
+                        METRICS.inc('videos_total', len(candidates) - len(unseen), outcome='skipped_seen')
+                        candidates = unseen
+                    if self.two_phase_search:
+                        candidates = [
+                            entry for entry in candidates
+                            if self._prefilter_flat_entry(entry, current_date, skip_ids)
+                        ]
+                    
+                    # 第二阶段：只对候选视频提取完整信息，凑够数量后停止
+                    for flat_entry in candidates:
+                        if len(videos) >= max_results:
+                            break
+                        # 本次爬取中已提取过的视频只记录命中，不再重复提取和下载缩略图
+                        known = self._extracted.get(flat_entry['id'])
+                        if known is not None:
+                            METRICS.inc('videos_total', outcome='reused')
+                            videos.append(known)
+                            continue
                         try:
-                            time.sleep(random.uniform(0.5, 1.5))
+                            entry = self._extract_video(ydl, flat_entry['id'])
+                            if not entry:
+                                continue
                             
                             # 获取视频ID和标题
                             video_id = entry.get('id', '')
@@ -172,17 +2573,19 @@ class YouTubeCrawler:
                                     days_difference = (current_date - video_date).days
                                     
                                     # 如果视频超过730天（2年），跳过这个视频
-                                    if days_difference > 730:
-                                        print(f"跳过较旧的视频: {video_title}")
+                                    if days_difference > MAX_VIDEO_AGE_DAYS:
+                                        METRICS.inc('videos_total', outcome='skipped_old')
+                                        logger.info(f"跳过较旧的视频: {video_title}")
+                                        self._reject(video_id)
                                         continue
                                     
                                     # 格式化日期为YYYY-MM-DD
                                     formatted_date = video_date.strftime('%Y-%m-%d')
                                 except:
-                                    print(f"日期格式错误: {upload_date}")
+                                    logger.warning(f"日期格式错误: {upload_date}")
                                     continue
                             else:
-                                print(f"无法获取视频发布日期: {video_title}")
+                                logger.warning(f"无法获取视频发布日期: {video_title}")
                                 continue
                             
                             # 获取缩略图链接
@@ -194,35 +2597,64 @@ class YouTubeCrawler:
                             if not thumbnail_url:
                                 thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
                             
-                            # 下载缩略图
-                            thumbnail_path = self.download_thumbnail(thumbnail_url, video_title)
-                            
                             video_data = {
                                 'title': video_title,
                                 'description': entry.get('description', '') or '',
                                 'published_at': formatted_date,  # 使用格式化后的日期
                                 'video_id': video_id,
                                 'channel_title': entry.get('uploader', '') or '',
-                                'thumbnail_path': thumbnail_path,
+                                'thumbnail_path': '',
                                 'video_link': f"https://www.youtube.com/watch?v={video_id}",
                                 'duration': entry.get('duration', 0) or 0,
                                 'view_count': entry.get('view_count', 0) or 0,
-                                'like_count': entry.get('like_count', 0) or 0
+                                'like_count': entry.get('like_count', 0) or 0,
+                                'category': '',
+                                'search_keyword': '',
+                                'search_language': '',
+                                'search_hits': []
                             }
                             
                             # 只检查必要的条件（时长和时间限制）
-                            if 10 <= video_data['duration'] <= 240:
-                                videos.append(video_data)
+                            if MIN_DURATION <= video_data['duration'] <= MAX_DURATION:
+                                # 在记录登记并被其他线程共享之前评分
+                                self._score_accepted(video_data)
+                                # 缩略图交给后台流水线下载，记录立即返回
+                                # 其他线程可能同时提取了同一视频，只保留先登记的记录
+                                with self._hits_lock:
+                                    known = self._extracted.setdefault(video_id, video_data)
+                                if known is video_data:
+                                    self.thumbnails.submit(video_data, thumbnail_url)
+                                    METRICS.inc('videos_total', outcome='accepted')
+                                else:
+                                    METRICS.inc('videos_total', outcome='reused')
+                                videos.append(known)
+                            else:
+                                METRICS.inc('videos_total', outcome='skipped_duration')
+                                self._reject(video_id)
                             
+                        except QuotaExceededError:
+                            raise
                         except Exception as e:
-                            print(f"处理视频信息时出错: {e}")
+                            self.ydl_pool.report_error(ydl, e)
+                            METRICS.inc('videos_total', outcome='failed')
+                            logger.warning(f"处理视频信息时出错: {e}",
+                                           extra=log_fields('video_failed', video_id=flat_entry['id'], error=str(e)))
                             continue
                             
+                except QuotaExceededError:
+                    raise
                 except Exception as e:
-                    print(f"搜索失败: {e}")
+                    self.ydl_pool.report_error(ydl, e)
+                    METRICS.inc('search_failures_total')
+                    logger.warning(f"搜索失败: {e}",
+                                   extra=log_fields('search_failed', search_term=search_term, error=str(e)))
                     
+        except QuotaExceededError:
+            raise
         except Exception as e:
-            print(f"搜索视频时出错: {e}")
+            METRICS.inc('search_failures_total')
+            logger.error(f"搜索视频时出错: {e}",
+                         extra=log_fields('search_failed', search_term=search_term, error=str(e)))
         
         return videos
 
@@ -231,284 +2663,892 @@ class YouTubeCrawler:
         根据五个维度的关键词计算评分
         """
         try:
-            # 基础文本
-            title = video_info.get('title', '') or ''
-            description = video_info.get('description', '') or ''
-            text = (title + ' ' + description).lower()
-            
-            # 定义五个维度的关键词及其权重
-            dimensions = {
-                'AI技术': {
-                    'keywords': ['ai', '人工智能', '机器学习', '深度学习', '神经网络'],
-                    'weight': 0.25
-                },
-                '云计算': {
-                    'keywords': ['云计算', '云服务', '云平台', 'cloud', 'saas'],
-                    'weight': 0.2
-                },
-                '数字化': {
-                    'keywords': ['数字化', '数字转型', '智能化', '自动化', '信息化'],
-                    'weight': 0.2
-                },
-                '创新': {
-                    'keywords': ['创新', '革新', '突破', '前沿', '领先'],
-                    'weight': 0.15
-                },
-                '解决方案': {
-                    'keywords': ['解决方案', '应用', '落地', '实践', '案例'],
-                    'weight': 0.2
-                }
-            }
-            
-            # 计算每个维度的得分
-            dimension_scores = {}
-            for dim_name, dim_data in dimensions.items():
-                # 计算该维度下匹配的关键词数量
-                matches = sum(1 for keyword in dim_data['keywords'] if keyword in text)
-                # 计算维度得分（匹配数/关键词总数 * 权重）
-                dim_score = (matches / len(dim_data['keywords'])) * dim_data['weight']
-                dimension_scores[dim_name] = round(dim_score, 3)
-            
-            # 计算总分（所有维度得分之和）
-            total_score = sum(dimension_scores.values())
-            
-            # 归一化总分（确保不超过1）
-            total_score = min(total_score, 1)
+            with METRICS.timed('score'):
+                dimension_scores, totals = self.scorer.score_videos([video_info])
             
             return {
-                'total_score': round(total_score, 3),
-                'dimension_scores': dimension_scores
+                'total_score': float(totals[0]),
+                'dimension_scores': {
+                    dim_name: float(score)
+                    for dim_name, score in zip(self.scorer.dimension_names, dimension_scores[0])
+                }
             }
                 
         except Exception as e:
-            print(f"计算评分时出错: {e}")
+            METRICS.inc('score_failures_total')
+            logger.warning(f"计算评分时出错: {e}")
             return {
                 'total_score': 0,
-                'dimension_scores': {
-                    'AI技术': 0,
-                    '云计算': 0,
-                    '数字化': 0,
-                    '创新': 0,
-                    '解决方案': 0
-                }
+                'dimension_scores': {dim_name: 0 for dim_name in self.scorer.dimension_names}
             }
 
+    def _score_accepted(self, video: Dict):
+        """
+        为通过后处理筛选且尚未评分的视频补充评分
+
+        只应在记录被登记到 _extracted 或进度文件、被其他线程共享之前调用。
+        """
+        if self.passes_post_filter(video) and 'total_score' not in video:
+            video.update(self.calculate_score(video))
+
+    def calculate_scores(self, videos: List[Dict]) -> tuple:
+        """
+        批量计算评分，返回 (视频 × 维度 的得分矩阵, 总分数组)，维度顺序见 self.scorer.dimension_names
+        """
+        return self.scorer.score_videos(videos)
+
     def rank_videos(self, videos: List[Dict], keywords: List[str]) -> List[Dict]:
         """
-        根据关键词权重和 KNN 聚类对视频进行排序
+        根据关键词相关度和近邻聚集度对视频进行排序
+        """
+        with METRICS.timed('rank'):
+            return rank_records(
+                videos, keywords, os.path.join(self.output_dir, RANK_INDEX_FILE), self.term_processor
+            )
+
+    def _search_with_keyword(self, search_term: str, category: str, keyword: str,
+                             max_results: int, cutoff_date: datetime,
+                             language: str = 'zh', skip_ids: set = None) -> List[Dict]:
+        """
+        执行单个搜索词，并将类别、关键词和语言合并到结果的命中信息中
+
+        同一视频被多个搜索命中时共用一条记录，命中信息逐次累加。
+        """
+        hit = {'category': category, 'search_keyword': keyword, 'search_language': language}
+        videos = []
+        for video in self.get_video_info(search_term, max_results, skip_ids):
+            # 过滤早于截止日期的视频
+            if video['published_at'] < cutoff_date.strftime('%Y-%m-%d'):
+                continue
+            with self._hits_lock:
+                merge_search_hits(video, hit)
+            videos.append(video)
+        return videos
+
+    def _build_search_tasks(self, keywords: List[str]) -> List[tuple]:
+        """
+        按 类别 × 关键词 × 语言 展开搜索任务，顺序固定
         """
-        # 计算关键词权重
-        keyword_weights = {keyword: 1.0 for keyword in keywords}  # 可以根据需要调整权重
+        # 将中文关键词翻译为英文（这里使用简单映射，您可以根据需要扩展）
+        en_keywords = {
+            "ICT技术": "ICT",
+            "AI创新": "AI Innovation",
+            "企业展示": "Enterprise",
+            "科技峰会": "Tech Summit",
+            "产品发布会": "Product Launch"
+        }
         
-        # 创建特征矩阵
-        feature_matrix = []
-        for video in videos:
-            features = []
+        tasks = []
+        for cn_category, en_categories in self.search_categories.items():
             for keyword in keywords:
-                # 计算每个视频与关键词的匹配程度
-                match_score = 1.0 if keyword in video['title'] or keyword in video['description'] else 0.0
-                features.append(match_score * keyword_weights[keyword])
-            feature_matrix.append(features)
-        
-        # 使用 KNN 进行聚类
-        nbrs = NearestNeighbors(n_neighbors=5, algorithm='ball_tree').fit(feature_matrix)
-        distances, indices = nbrs.kneighbors(feature_matrix)
-        
-        # 计算每个视频的综合得分
-        scores = []
-        for i, video in enumerate(videos):
-            score = sum(1.0 / (distances[i][j] + 1e-5) for j in indices[i])  # 避免除以零
-            scores.append((video, score))
-        
-        # 根据得分排序
-        sorted_videos = sorted(scores, key=lambda x: x[1], reverse=True)
-        
-        return [video for video, score in sorted_videos]
+                # 先搜索中文关键词
+                tasks.append((f"{cn_category} {keyword}", cn_category, keyword, 'zh'))
+                
+                # 再搜索英文关键词，仍然使用中文类别进行标记
+                en_keyword = en_keywords.get(keyword, keyword)
+                for en_category in en_categories:
+                    tasks.append((f"{en_category} {en_keyword}", cn_category, keyword, 'en'))
+        return tasks
+
+    @staticmethod
+    def _interleave_by_category(tasks: List[tuple]) -> List[tuple]:
+        """
+        按类别轮流排列任务，配额不足时各类别分到的请求数大致相同
+        """
+        by_category = OrderedDict()
+        for task in tasks:
+            by_category.setdefault(task[1], []).append(task)
+        queues = list(by_category.values())
+        interleaved = []
+        for i in range(max((len(queue) for queue in queues), default=0)):
+            interleaved.extend(queue[i] for queue in queues if i < len(queue))
+        return interleaved
 
-    def search_videos(self, keywords: List[str], max_results: int = 50) -> List[Dict]:
+    def search_videos(self, keywords: List[str], max_results: int = 50, resume: bool = False,
+                      on_video=None, incremental: bool = False, refresh_stale: bool = False) -> List[Dict]:
         """
-        根据关键词搜索视频
+        根据关键词搜索视频，搜索任务由线程池并发执行
+
+        进度记录在 search_progress.json 中，resume 为 True 时跳过已完成的任务。
+        每个视频首次被命中时调用一次 on_video，供调用方流式处理结果。
+        任务按类别轮流执行以公平分配每日配额，结果仍按固定的任务顺序合并，每个视频一条记录。
+        incremental 为 True 时跳过以前运行中已获取过的视频；同时指定 refresh_stale 时，
+        统计字段超过 STATS_REFRESH_DAYS 天的视频会重新获取。
         """
-        video_results = []
-        results_file = os.path.join(self.output_dir, 'search_progress.json')
+        results_file = os.path.join(self.output_dir, CHECKPOINT_FILE)
+        checkpoint = CrawlCheckpoint(results_file, self.checkpoint_interval)
+        if not (resume and checkpoint.load()):
+            checkpoint.reset()
+        completed = checkpoint.completed_tasks()
+        # 已完成任务中的视频在后续搜索中再次命中时直接复用
+        for task in completed:
+            for video in checkpoint.get_videos(task):
+                # 旧版本的进度文件中可能没有评分，在搜索线程启动前补充
+                self._score_accepted(video)
+                self._extracted.setdefault(video['video_id'], video)
+        
+        skip_ids = set()
+        if incremental:
+            skip_ids = self.seen_index.skip_ids(STATS_REFRESH_DAYS * 86400 if refresh_stale else None)
+            logger.info(f"增量模式：已爬取视频 {len(self.seen_index)} 个，本次跳过 {len(skip_ids)} 个")
         
         two_years_ago = datetime.now() - timedelta(days=2*365)
         
-        print(f"开始搜索，类别数量: {len(self.search_categories)}")
-        print(f"搜索关键词数量: {len(keywords)}")
+        logger.info(f"开始搜索，类别数量: {len(self.search_categories)}")
+        logger.info(f"搜索关键词数量: {len(keywords)}")
         
         results_per_request = 5
-        daily_quota_limit = 100
-        request_count = 0
         
-        # 遍历中文类别和对应的英文类别
-        for cn_category, en_categories in self.search_categories.items():
-            # 先搜索中文类别
-            for keyword in keywords:
-                if request_count >= daily_quota_limit:
-                    print("达到每日配额限制，保存进度并退出")
-                    return video_results
-                
-                # 搜索中文关键词
-                video_results.extend(self._search_with_keyword(
-                    f"{cn_category} {keyword}",
-                    cn_category,
-                    keyword,
-                    results_per_request,
-                    two_years_ago
-                ))
-                
-                # 搜索英文关键词
-                for en_category in en_categories:
-                    # 将中文关键词翻译为英文（这里使用简单映射，您可以根据需要扩展）
-                    en_keyword = {
-                        "ICT技术": "ICT",
-                        "AI创新": "AI Innovation",
-                        "企业展示": "Enterprise",
-                        "科技峰会": "Tech Summit",
-                        "产品发布会": "Product Launch"
-                    }.get(keyword, keyword)
-                    
-                    video_results.extend(self._search_with_keyword(
-                        f"{en_category} {en_keyword}",
-                        cn_category,  # 仍然使用中文类别进行标记
+        tasks = self._build_search_tasks(keywords)
+        pending_count = sum(1 for task in tasks if task not in completed)
+        logger.info(f"搜索任务数量: {len(tasks)}（待执行 {pending_count}），并发线程数: {self.max_workers}，"
+              f"今日剩余请求配额: {self.quota.remaining()}")
+        quota_reached = threading.Event()
+        
+        def run_task(task):
+            if task in completed:
+                videos = checkpoint.get_videos(task)
+            elif quota_reached.is_set():
+                return []
+            else:
+                search_term, category, keyword, language = task
+                try:
+                    videos = self._search_with_keyword(
+                        search_term,
+                        category,
                         keyword,
                         results_per_request,
-                        two_years_ago
-                    ))
-                
-                request_count += 1
+                        two_years_ago,
+                        language,
+                        skip_ids
+                    )
+                except QuotaExceededError:
+                    # 未完成的任务不记入进度，下次使用 --resume 继续
+                    if not quota_reached.is_set():
+                        quota_reached.set()
+                        logger.warning("达到每日请求配额限制，剩余搜索任务将被跳过，可使用 --resume 继续",
+                                       extra=log_fields('quota_reached'))
+                    return []
+                except Exception as e:
+                    logger.error(f"搜索任务失败 {search_term}: {e}",
+                                 extra=log_fields('task_failed', search_term=search_term, error=str(e)))
+                    return []
+                checkpoint.record(task, videos)
+            
+            if on_video:
+                for video in videos:
+                    with self._hits_lock:
+                        first_hit = video['video_id'] not in streamed
+                        streamed.add(video['video_id'])
+                    if first_hit:
+                        on_video(video)
+            return videos
+        
+        # 按类别轮流提交任务，再按固定的任务顺序取回结果，保证合并后的顺序确定
+        streamed = set()
+        merged = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {task: executor.submit(run_task, task) for task in self._interleave_by_category(tasks)}
+                for task in tasks:
+                    for video in futures[task].result():
+                        merged.setdefault(video['video_id'], video)
+        finally:
+            # 无论正常结束还是中断，都写入最新进度、配额用量和已爬取视频索引；
+            # 先等待缩略图下载完成，进度文件中的记录才带有缩略图路径，--resume 复用时不会缺失缩略图
+            self.thumbnails.wait()
+            checkpoint.save()
+            self.quota.save()
+            self.seen_index.mark(merged)
+        video_results = list(merged.values())
                 
         # 在获取视频信息后调用 rank_videos 方法
         ranked_videos = self.rank_videos(video_results, keywords)
         
         return ranked_videos
 
-    def save_to_csv(self, results: List[Dict]):
+    def post_process_results(self, videos: List[Dict]) -> List[Dict]:
         """
-        将搜索结果保存为CSV文件
+        对爬取到的视频结果进行后处理筛选
         """
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        csv_file = os.path.join(self.output_dir, f'youtube_search_results_{timestamp}.csv')
-        
-        try:
-            with open(csv_file, 'w', newline='', encoding='utf-8-sig') as f:
-                fieldnames = [
-                    '标题', 
-                    '描述', 
-                    '发布时间', 
-                    '视频ID', 
-                    '频道名称', 
-                    '缩略图文件名',
-                    '分类', 
-                    '搜索关键词', 
-                    '视频链接',
-                    '视频时长(秒)',
-                    '搜索语言',
-                    '总评分',
-                    'AI技术得分',
-                    '云计算得分',
-                    '数字化得分',
-                    '创新得分',
-                    '解决方案得分'
-                ]
-                
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for result in results:
-                    if not result:
-                        continue
-                    
-                    try:
-                        # 获取维度得分
-                        dimension_scores = result.get('dimension_scores', {})
-                        
-                        row = {
-                            '标题': result['title'],
-                            '描述': result['description'],
-                            '发布时间': result['published_at'],
-                            '视频ID': result['video_id'],
-                            '频道名称': result['channel_title'],
-                            '缩略图文件名': os.path.basename(result['thumbnail_path']) if result['thumbnail_path'] else '',
-                            '分类': result['category'],
-                            '搜索关键词': result['search_keyword'],
-                            '视频链接': result['video_link'],
-                            '视频时长(秒)': result['duration'],
-                            '搜索语言': result['search_language'],
-                            '总评分': result.get('total_score', 0),
-                            'AI技术得分': dimension_scores.get('AI技术', 0),
-                            '云计算得分': dimension_scores.get('云计算', 0),
-                            '数字化得分': dimension_scores.get('数字化', 0),
-                            '创新得分': dimension_scores.get('创新', 0),
-                            '解决方案得分': dimension_scores.get('解决方案', 0)
-                        }
-                        writer.writerow(row)
-                    except Exception as e:
-                        print(f"保存单条结果时出错: {e}")
-                        continue
-                    
-            print(f"结果已成功保存到 {csv_file}")
-            
-        except Exception as e:
-            print(f"保存CSV文件时出错: {e}")
+        return [video for video in videos if self.passes_post_filter(video)]
 
-    def post_process_results(self, videos: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def passes_post_filter(video: Dict) -> bool:
         """
-        对爬取到的视频结果进行后处理筛选
+        单条视频的后处理筛选条件
         """
-        filtered_videos = []
-        
-        for video in videos:
-            # 筛选条件：视频时长在10秒到240秒之间，观看次数大于100，点赞数大于10
-            if (10 <= video.get('duration', 0) <= 240 and
+        # 筛选条件：视频时长在10秒到240秒之间，观看次数大于100，点赞数大于10
+        return (MIN_DURATION <= video.get('duration', 0) <= MAX_DURATION and
                 video.get('view_count', 0) > 100 and
-                video.get('like_count', 0) > 10):
-                filtered_videos.append(video)
-        
-        return filtered_videos
+                video.get('like_count', 0) > 10)
 
-    def crawl_and_save(self, keywords: List[str]):
+    def crawl_and_save(self, keywords: List[str], resume: bool = False, formats=OUTPUT_FORMATS,
+                       incremental: bool = False, refresh_stale: bool = False, metrics_file: str = None):
         """
         爬取视频并保存结果
+
+        通过筛选的视频在搜索过程中即流式写入输出文件，结束后再按排序结果整理，每个视频一行。
+        指定 metrics_file 时定期写入 Prometheus 文本格式的指标。
         """
-        videos = self.search_videos(keywords)
+        sink = ResultSink(self.output_dir, formats)
+        stop_metrics = METRICS.write_periodically(metrics_file) if metrics_file else None
+        start = time.perf_counter()
         
-        # 对爬取结果进行后处理筛选
-        filtered_videos = self.post_process_results(videos)
+        def stream(video: Dict):
+            # 评分已在提取时完成，缩略图路径回填后再写入
+            if self.passes_post_filter(video):
+                self.thumbnails.then(video, sink.write)
         
-        self.save_to_csv(filtered_videos)
-        print(f"已完成爬取，共找到 {len(filtered_videos)} 个视频")
+        try:
+            videos = self.search_videos(keywords, resume=resume, on_video=stream,
+                                        incremental=incremental, refresh_stale=refresh_stale)
+        finally:
+            # 等待后台缩略图下载完成，确保已接受的记录全部写出
+            self.thumbnails.wait()
+            sink.close()
+            self.ydl_pool.close()
+            self.seen_index.close()
+            logger.info(self.credentials.summary())
+            if stop_metrics:
+                stop_metrics.set()
+        
+        # 按排序结果整理输出文件，并将通过筛选的结果写入结果数据库
+        with METRICS.timed('save'):
+            accepted = [video for video in videos if self.passes_post_filter(video)]
+            sink.finalize(accepted)
+            store = ResultStore(os.path.join(self.output_dir, RESULT_DB_FILE))
+            try:
+                count = store.upsert(accepted)
+            finally:
+                store.close()
+        for path in sink.paths.values():
+            logger.info(f"结果已成功保存到 {path}")
+        logger.info(f"已写入结果数据库 {count} 个视频")
+        
+        elapsed = time.perf_counter() - start
+        logger.info(f"已完成爬取，共找到 {sink.count} 个视频，耗时 {elapsed:.1f} 秒",
+                    extra=log_fields('crawl_finished', videos=sink.count, seconds=round(elapsed, 3),
+                                     metrics=METRICS.snapshot()))
+        if metrics_file:
+            METRICS.write_prometheus(metrics_file)
 
 class SearchTermProcessor:
-    def __init__(self):
+    def __init__(self, preload: bool = False, background: bool = True,
+                 cache_size: int = TOKEN_CACHE_SIZE, dict_cache_dir: str = None):
+        """
+        初始化分词器
+
+        preload 为 True 时提前加载 jieba 词典（background 为 True 时在后台线程中加载），
+        避免第一次分词时的冷启动延迟；dict_cache_dir 指定 jieba 序列化词典缓存的目录。
+        分词结果按文本缓存，最多保留 cache_size 条，超出后淘汰最久未使用的结果。
+        """
         self.stop_words = set(['的', '了', '和', '与', '或', '在', '是'])
-    
-    def process_query(self, query: str) -> tuple:
-        # 分词
-        words = jieba.cut_for_search(query)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._loader = None
+        if dict_cache_dir:
+            jieba.dt.tmp_dir = dict_cache_dir
+        if preload:
+            if background:
+                self._loader = threading.Thread(target=jieba.initialize, name='jieba-init', daemon=True)
+                self._loader.start()
+            else:
+                jieba.initialize()
+
+    def _wait_for_dictionary(self):
+        """
+        等待后台词典加载完成
+        """
+        loader = self._loader
+        if loader is not None:
+            loader.join()
+            self._loader = None
+
+    def _clean(self, words) -> tuple:
         # 清理和标准化
         words = [w.lower().strip() for w in words]
         # 过滤停用词
-        words = [w for w in words if w not in self.stop_words and len(w) > 1]
+        return tuple(w for w in words if w not in self.stop_words and len(w) > 1)
+
+    def _remember(self, query: str, words: tuple):
+        with self._cache_lock:
+            self._cache[query] = words
+            self._cache.move_to_end(query)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _tokenize(self, query: str) -> tuple:
+        """
+        分词并清理，优先使用缓存
+        """
+        with self._cache_lock:
+            words = self._cache.get(query)
+            if words is not None:
+                self._cache.move_to_end(query)
+                return words
+        # 分词
+        words = self._clean(jieba.cut_for_search(query))
+        self._remember(query, words)
+        return words
+
+    def process_query(self, query: str) -> tuple:
+        """
+        分词并统计词频，相同文本的分词结果会被缓存
+        """
+        self._wait_for_dictionary()
         # 统计词频
-        term_freq = Counter(words)
+        term_freq = Counter(self._tokenize(query))
         
         return list(term_freq.keys()), term_freq
 
-def main():
-    crawler = YouTubeCrawler()
+    def process_many(self, queries: List[str], parallel: bool = None) -> List[tuple]:
+        """
+        批量分词，返回与 process_query 相同格式的结果列表
+
+        未缓存的文本数量较多时，使用 jieba 并行模式在多个进程中分词
+        （并行模式不支持 Windows，此时退回逐条分词）。
+        结果直接由本次分词结果组成，缓存只用于命中，批量大于缓存容量时也不会重复分词。
+        """
+        self._wait_for_dictionary()
+        words = {}
+        with self._cache_lock:
+            for query in dict.fromkeys(queries):
+                cached = self._cache.get(query)
+                if cached is not None:
+                    self._cache.move_to_end(query)
+                    words[query] = cached
+        misses = [query for query in dict.fromkeys(queries) if query not in words]
+        if parallel is None:
+            parallel = len(misses) >= TOKENIZE_PARALLEL_MIN and TOKENIZE_PROCESSES > 1
+        
+        if misses and parallel:
+            tokenized = self._cut_parallel(misses)
+            if tokenized is not None:
+                for query, query_words in zip(misses, tokenized):
+                    words[query] = query_words
+                    self._remember(query, query_words)
+        for query in misses:
+            if query not in words:
+                words[query] = self._tokenize(query)
+        
+        results = []
+        for query in queries:
+            term_freq = Counter(words[query])
+            results.append((list(term_freq.keys()), term_freq))
+        return results
+
+    def _cut_parallel(self, queries: List[str]) -> List[tuple]:
+        """
+        使用 jieba 并行模式对一批文本分词，每条文本占一行；不支持并行时返回 None
+        """
+        try:
+            jieba.enable_parallel(TOKENIZE_PROCESSES)
+        except NotImplementedError:
+            return None
+        try:
+            joined = '\n'.join(' '.join(query.splitlines()) for query in queries)
+            words = list(jieba.cut_for_search(joined))
+        finally:
+            jieba.disable_parallel()
+        
+        # 按换行符把分词结果拆回每条文本
+        tokenized = []
+        current = []
+        for word in words:
+            if word == '\n':
+                tokenized.append(self._clean(current))
+                current = []
+            else:
+                current.append(word)
+        tokenized.append(self._clean(current))
+        return tokenized if len(tokenized) == len(queries) else None
+
+# 合成数据使用的填充词，与评分关键词混合生成标题和描述
+_FILLER_WORDS = ['发布会', '演示', '平台', '企业', '产品', '峰会', '未来', '技术', 'launch', 'demo',
+                 'platform', 'summit', 'keynote', 'update', 'overview', 'review']
+
+
+def synthetic_video(index: int, rnd: random.Random, thumbnail_base: str = 'https://i.ytimg.com') -> Dict:
+    """
+    生成一条 yt-dlp extract_info 格式的合成视频信息，同一 index 和随机数状态生成的结果相同
+    """
+    vocabulary = [keyword for config in SCORING_DIMENSIONS.values() for keyword in config['keywords']]
+    words = rnd.choices(vocabulary, k=3) + rnd.choices(_FILLER_WORDS, k=4)
+    video_id = f"bench{index:06d}"
+    return {
+        'id': video_id,
+        'title': ' '.join(words[:4]),
+        'description': ' '.join(rnd.sample(words, len(words)) * 8),
+        'upload_date': (datetime.now() - timedelta(days=rnd.randint(0, MAX_VIDEO_AGE_DAYS + 60))).strftime('%Y%m%d'),
+        'uploader': f"channel_{rnd.randint(0, 199)}",
+        'duration': rnd.randint(5, 300),
+        'view_count': rnd.randint(0, 100000),
+        'like_count': rnd.randint(0, 5000),
+        'thumbnails': [{'url': f"{thumbnail_base}/vi/{video_id}/hqdefault.jpg"}],
+    }
+
+
+def synthetic_records(count: int, seed: int = 0) -> List[Dict]:
+    """
+    生成 count 条与爬取输出格式相同的合成视频记录
+    """
+    rnd = random.Random(seed)
+    categories = list(SCORING_DIMENSIONS)
+    records = []
+    for index in range(count):
+        info = synthetic_video(index, rnd)
+        hit = [rnd.choice(categories), rnd.choice(DEFAULT_KEYWORDS), rnd.choice(('zh', 'en'))]
+        records.append({
+            'title': info['title'],
+            'description': info['description'],
+            'published_at': datetime.strptime(info['upload_date'], '%Y%m%d').strftime('%Y-%m-%d'),
+            'video_id': info['id'],
+            'channel_title': info['uploader'],
+            'thumbnail_path': '',
+            'video_link': f"https://www.youtube.com/watch?v={info['id']}",
+            'duration': info['duration'],
+            'view_count': info['view_count'],
+            'like_count': info['like_count'],
+            'category': hit[0],
+            'search_keyword': hit[1],
+            'search_language': hit[2],
+            'search_hits': [hit],
+        })
+    return records
+
+
+class FakeYoutubeDL:
+    """
+    本地模拟的 yt_dlp.YoutubeDL，按固定延迟返回合成的搜索结果和视频信息，不访问网络
+
+    搜索结果中的视频 ID 由搜索词决定，在 corpus_size 范围内取值，不同搜索之间会重复命中。
+    stats 记录搜索和视频信息请求的次数，由所有实例共享。
+    """
+    def __init__(self, params: Dict = None, latency: float = BENCH_CRAWL_LATENCY,
+                 corpus_size: int = BENCH_CORPUS_SIZE, thumbnail_base: str = 'https://i.ytimg.com',
+                 stats: Counter = None):
+        self.params = params or {}
+        self.latency = latency
+        self.corpus_size = corpus_size
+        self.thumbnail_base = thumbnail_base
+        self.stats = stats if stats is not None else Counter()
+
+    def extract_info(self, url: str, download: bool = False) -> Dict:
+        time.sleep(self.latency)
+        if url.startswith('ytsearch'):
+            count, _, term = url[len('ytsearch'):].partition(':')
+            rnd = random.Random(term)
+            self.stats['queries'] += 1
+            return {'entries': [
+                {'id': f"bench{rnd.randrange(self.corpus_size):06d}"} for _ in range(int(count or 1))
+            ]}
+        video_id = url.rsplit('=', 1)[-1]
+        self.stats['videos'] += 1
+        index = int(video_id[len('bench'):])
+        return synthetic_video(index, random.Random(index), self.thumbnail_base)
+
+    def close(self):
+        pass
+
+
+class ThumbnailServer:
+    """
+    本地缩略图 HTTP 服务器，在后台线程中运行，任意路径都返回同一张固定大小的图片
+    """
+    def __init__(self, size: int = BENCH_THUMBNAIL_BYTES):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        
+        body = os.urandom(size)
+        stats = self.stats = Counter()
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stats['requests'] += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name='thumbnail-server', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class Benchmark:
+    """
+    基准测试：在本地模拟的提取器和缩略图服务器上运行完整爬取，
+    再在不同规模的合成数据上分别测量评分、筛选、排序和入库的耗时
+
+    每个阶段记录耗时、吞吐量，可选记录 tracemalloc 峰值内存和 cProfile 分析结果。
+    """
+    def __init__(self, memory: bool = False, profile_dir: str = None):
+        self.memory = memory
+        self.profile_dir = profile_dir
+        self.results = []
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def measure(self, stage: str, size: int, func, *args, **kwargs):
+        """
+        运行 func 并记录一个阶段的结果，返回 func 的返回值
+        """
+        profiler = None
+        if self.profile_dir:
+            import cProfile
+            profiler = cProfile.Profile()
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            value = func(*args, **kwargs)
+        finally:
+            if profiler:
+                profiler.disable()
+            seconds = time.perf_counter() - start
+            peak = None
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        
+        result = {'stage': stage, 'size': size, 'seconds': seconds,
+                  'per_second': size / seconds if seconds > 0 else 0.0, 'peak_bytes': peak}
+        self.results.append(result)
+        self._print(result)
+        if profiler:
+            self._dump_profile(profiler, f"{stage}_{size}")
+        return value
+
+    @staticmethod
+    def _print(result: Dict):
+        line = f"{result['stage']:<12}{result['size']:>10}  {result['seconds']:>9.3f} s  {result['per_second']:>12.1f} /s"
+        if result['peak_bytes'] is not None:
+            line += f"  峰值内存 {result['peak_bytes'] / 1024 / 1024:.1f} MB"
+        print(line)
+
+    def _dump_profile(self, profiler, name: str):
+        import pstats
+        path = os.path.join(self.profile_dir, f"{name}.prof")
+        profiler.dump_stats(path)
+        print(f"  分析结果已保存到 {path}，耗时最多的函数：")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(8)
+
+    def run_crawl(self, keywords: List[str], latency: float = BENCH_CRAWL_LATENCY,
+                  corpus_size: int = BENCH_CORPUS_SIZE, max_workers: int = MAX_WORKERS):
+        """
+        使用模拟提取器和本地缩略图服务器运行一次完整爬取，统计每秒搜索数和视频数
+        """
+        import tempfile
+        from functools import partial
+        
+        with tempfile.TemporaryDirectory() as output_dir, ThumbnailServer() as server:
+            stats = Counter()
+            factory = partial(FakeYoutubeDL, latency=latency, corpus_size=corpus_size,
+                              thumbnail_base=server.base_url, stats=stats)
+            crawler = YouTubeCrawler(max_workers=max_workers, requests_per_second=1000.0, cookie_files=[],
+                                     output_dir=output_dir, ydl_factory=factory)
+            # 基准测试不受每日配额限制，也不加随机延迟
+            crawler.quota.daily_limit = float('inf')
+            crawler.throttle.jitter = 0
+            
+            start = time.perf_counter()
+            self.measure('crawl', len(crawler._build_search_tasks(keywords)), crawler.crawl_and_save, keywords)
+            seconds = time.perf_counter() - start
+            print(f"  搜索 {stats['queries']} 次（{stats['queries'] / seconds:.1f} 次/秒），"
+                  f"提取视频 {stats['videos']} 个（{stats['videos'] / seconds:.1f} 个/秒），"
+                  f"下载缩略图 {server.stats['requests']} 张")
+
+    def run_offline(self, sizes, keywords: List[str], seed: int = 0):
+        """
+        在不同规模的合成数据上测量评分、筛选、排序和入库
+        """
+        import tempfile
+        
+        term_processor = SearchTermProcessor(preload=True, background=False)
+        for size in sizes:
+            records = synthetic_records(size, seed)
+            with tempfile.TemporaryDirectory() as work_dir:
+                self.measure('score', size, score_records, records)
+                self.measure('filter', size, lambda: [r for r in records if YouTubeCrawler.passes_post_filter(r)])
+                self.measure('rank', size, rank_records, records, keywords,
+                             os.path.join(work_dir, RANK_INDEX_FILE), term_processor)
+                store = ResultStore(os.path.join(work_dir, RESULT_DB_FILE))
+                try:
+                    self.measure('store', size, store.upsert, records)
+                finally:
+                    store.close()
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.results, f, ensure_ascii=False, indent=2)
+        print(f"基准测试结果已保存到 {path}")
+
+    def compare(self, baseline_path: str, tolerance: float = BENCH_REGRESSION_TOLERANCE) -> List[Dict]:
+        """
+        与基线结果比较，返回耗时增加超过 tolerance 的阶段
+        """
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = {(item['stage'], item['size']): item for item in json.load(f)}
+        regressions = []
+        for result in self.results:
+            base = baseline.get((result['stage'], result['size']))
+            if base and result['seconds'] > base['seconds'] * (1 + tolerance):
+                regressions.append(result)
+                print(f"性能回退：{result['stage']}（{result['size']} 条）耗时 {result['seconds']:.3f} s，"
+                      f"基线 {base['seconds']:.3f} s")
+        if not regressions:
+            print("与基线相比没有性能回退")
+        return regressions
+
+
+def _load_records(paths: List[str]):
+    """
+    按顺序逐条读取多个结果文件中的记录，不把全部记录载入内存
+    """
+    for path in paths:
+        yield from iter_records(path)
+
+
+def _write_records(records, output_dir: str, formats) -> ResultSink:
+    os.makedirs(output_dir, exist_ok=True)
+    sink = ResultSink(output_dir, formats)
+    try:
+        for record in records:
+            sink.write(record)
+    finally:
+        sink.close()
+    for path in sink.paths.values():
+        logger.info(f"结果已成功保存到 {path}")
+    return sink
+
+
+def cmd_crawl(args):
+    if args.metrics_port is not None:
+        METRICS.serve(args.metrics_port, args.metrics_host)
+    crawler = YouTubeCrawler(args.api_keys, cookie_files=args.cookie_files, output_dir=args.output_dir)
+    try:
+        crawler.crawl_and_save(args.keywords, resume=args.resume, formats=args.formats or OUTPUT_FORMATS,
+                               incremental=args.incremental, refresh_stale=args.refresh_stale,
+                               metrics_file=args.metrics_file)
+    except Exception as e:
+        logger.error(f"爬取过程中断: {e}", extra=log_fields('crawl_failed', error=str(e)))
+
+
+def cmd_rescore(args):
+    index_path = os.path.join(args.output_dir, RANK_INDEX_FILE) if args.rank_keywords else None
+    os.makedirs(args.output_dir, exist_ok=True)
+    batch = rescore_records(_load_records(args.inputs), args.rank_keywords, index_path,
+                            processes=args.processes, chunk_size=args.chunk_size)
+    _write_records(batch.iter_records(), args.output_dir, args.formats or OUTPUT_FORMATS)
+    if args.db:
+        store = ResultStore(args.db)
+        try:
+            logger.info(f"已写入结果数据库 {store.upsert(batch.iter_records())} 个视频")
+        finally:
+            store.close()
+
+
+def cmd_rank(args):
+    batch = VideoBatch.from_records(_load_records(args.inputs))
+    logger.info(f"已读取 {len(batch)} 条记录")
+    os.makedirs(args.output_dir, exist_ok=True)
+    order = batch.rank_order(args.keywords, os.path.join(args.output_dir, RANK_INDEX_FILE))
+    _write_records(batch.iter_records(order), args.output_dir, args.formats or OUTPUT_FORMATS)
+
+
+def cmd_export(args):
+    _write_records(_load_records(args.inputs), args.output_dir, args.formats or ['csv'])
+
+
+def cmd_store(args):
+    store = ResultStore(args.db)
+    try:
+        logger.info(f"已写入结果数据库 {store.upsert(_load_records(args.inputs))} 个视频")
+    finally:
+        store.close()
+
+
+def cmd_query(args):
+    store = ResultStore(args.db)
+    try:
+        records = store.query(
+            category=args.category, keyword=args.keyword, channel=args.channel,
+            since=args.since, until=args.until, min_score=args.min_score,
+            order_by=args.order_by, limit=args.limit
+        )
+    finally:
+        store.close()
+    print(f"查询到 {len(records)} 个视频")
+    if args.formats:
+        _write_records(records, args.output_dir, args.formats)
+        return
+    for record in records:
+        print(f"{record['total_score']:.3f}  {record['published_at']}  {record['category']}  "
+              f"{record['title']}  {record['video_link']}")
+
+
+def cmd_bench(args):
+    bench = Benchmark(memory=args.memory, profile_dir=args.profile_dir)
+    if not args.skip_crawl:
+        bench.run_crawl(args.keywords, latency=args.latency, corpus_size=args.corpus_size)
+    bench.run_offline(args.sizes, args.keywords)
+    if args.json:
+        bench.save(args.json)
+    if args.baseline and bench.compare(args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+def print_startup_report(command_start: float, budget: float = STARTUP_BUDGET):
+    """
+    输出启动耗时报告：脚本加载耗时以及各个延迟导入模块的耗时
+
+    更细致的分析可使用 python -X importtime youtube-crawler.py ...
+    """
+    startup = command_start - _START_TIME
+    print(f"启动耗时: {startup * 1000:.1f} ms（预算 {budget * 1000:.0f} ms）", file=sys.stderr)
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True):
+        print(f"  延迟导入 {name}: {seconds * 1000:.1f} ms", file=sys.stderr)
+    if startup > budget:
+        print("警告：启动耗时超出预算", file=sys.stderr)
+
+
+COMMANDS = ('crawl', 'rescore', 'rank', 'export', 'store', 'query', 'bench')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='YouTube 视频爬虫')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='结束时输出启动耗时和各依赖的导入耗时')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='日志级别')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    def add_output_args(subparser, default_dir='youtube_crawl_results'):
+        subparser.add_argument('-o', '--output-dir', default=default_dir, help='输出目录')
+        subparser.add_argument('--format', dest='formats', action='append',
+                               choices=['csv', 'jsonl', 'parquet'], help='输出格式，可重复指定')
+    
+    crawl = subparsers.add_parser('crawl', help='搜索并爬取视频（默认命令）')
+    crawl.add_argument('keywords', nargs='*', default=DEFAULT_KEYWORDS, help='搜索关键词')
+    crawl.add_argument('--resume', action='store_true', help='从 search_progress.json 继续上次未完成的爬取')
+    crawl.add_argument('--incremental', action='store_true', help='跳过以前运行中已获取过的视频')
+    crawl.add_argument('--refresh-stale', action='store_true',
+                       help=f'增量模式下重新获取统计字段超过 {STATS_REFRESH_DAYS} 天的视频')
+    crawl.add_argument('--api-key', dest='api_keys', action='append', help='API 密钥，可重复指定')
+    crawl.add_argument('--cookies', dest='cookie_files', action='append',
+                       help='cookies 文件，可重复指定以轮换使用多个身份，默认为脚本目录下的 cookies.txt')
+    crawl.add_argument('--event-log', help='将日志和事件以 JSON 行格式追加写入该文件')
+    crawl.add_argument('--metrics-file', help='定期将 Prometheus 文本格式的指标写入该文件')
+    crawl.add_argument('--metrics-port', type=int, help='在该端口提供 Prometheus 指标 HTTP 服务')
+    crawl.add_argument('--metrics-host', default=METRICS_HOST,
+                       help=f'指标 HTTP 服务监听的地址（默认 {METRICS_HOST}，0.0.0.0 表示所有网卡）')
+    add_output_args(crawl)
+    crawl.set_defaults(func=cmd_crawl)
+    
+    rescore = subparsers.add_parser('rescore', help='按当前评分配置重新计算已保存结果的评分，可同时重新排序')
+    rescore.add_argument('inputs', nargs='+', help='JSONL 结果文件、search_progress.json 或结果数据库（.db）')
+    rescore.add_argument('-k', '--keyword', dest='rank_keywords', action='append', default=None,
+                         help='指定后按这些关键词重新排序，可重复指定')
+    rescore.add_argument('-j', '--processes', type=int, default=RESCORE_PROCESSES, help='并行进程数')
+    rescore.add_argument('--chunk-size', type=int, default=RESCORE_CHUNK_SIZE, help='每个进程任务包含的记录数')
+    rescore.add_argument('--db', help='将重新评分的结果写回该结果数据库')
+    add_output_args(rescore)
+    rescore.set_defaults(func=cmd_rescore)
+    
+    rank = subparsers.add_parser('rank', help='对已保存的结果重新排序')
+    rank.add_argument('inputs', nargs='+', help='JSONL 结果文件或 search_progress.json')
+    rank.add_argument('-k', '--keyword', dest='keywords', action='append', default=None,
+                      help='排序使用的关键词，可重复指定')
+    add_output_args(rank)
+    rank.set_defaults(func=cmd_rank)
     
-    # 减少测试关键词
-    keywords = [
-        "AI创新",
-        "科技峰会"
-    ]
+    export = subparsers.add_parser('export', help='将已保存的结果导出为 CSV / JSONL / Parquet')
+    export.add_argument('inputs', nargs='+', help='JSONL 结果文件或 search_progress.json')
+    add_output_args(export)
+    export.set_defaults(func=cmd_export)
+    
+    default_db = os.path.join('youtube_crawl_results', RESULT_DB_FILE)
+    store = subparsers.add_parser('store', help='将已保存的结果导入结果数据库')
+    store.add_argument('inputs', nargs='+', help='JSONL 结果文件或 search_progress.json')
+    store.add_argument('--db', default=default_db, help='结果数据库路径')
+    store.set_defaults(func=cmd_store)
+    
+    query = subparsers.add_parser('query', help='从结果数据库查询视频，可导出为 CSV / JSONL / Parquet')
+    query.add_argument('--db', default=default_db, help='结果数据库路径')
+    query.add_argument('-c', '--category', help='分类')
+    query.add_argument('-k', '--keyword', help='搜索关键词')
+    query.add_argument('--channel', help='频道名称')
+    query.add_argument('--since', help='最早发布日期（YYYY-MM-DD）')
+    query.add_argument('--until', help='最晚发布日期（YYYY-MM-DD）')
+    query.add_argument('--min-score', type=float, help='最低总评分')
+    query.add_argument('--order-by', default='total_score', choices=RESULT_QUERY_ORDERS, help='排序字段（降序）')
+    query.add_argument('-n', '--limit', type=int, default=20, help='最多返回的视频数，0 表示不限制')
+    add_output_args(query)
+    query.set_defaults(func=cmd_query)
+    
+    bench = subparsers.add_parser('bench', help='使用本地模拟数据测量爬取、评分、排序和入库的性能')
+    bench.add_argument('-k', '--keyword', dest='keywords', action='append', default=None,
+                       help='搜索和排序使用的关键词，可重复指定')
+    bench.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES), help='合成视频数量')
+    bench.add_argument('--latency', type=float, default=BENCH_CRAWL_LATENCY, help='模拟提取器每次请求的延迟（秒）')
+    bench.add_argument('--corpus-size', type=int, default=BENCH_CORPUS_SIZE, help='模拟搜索结果中视频 ID 的取值范围')
+    bench.add_argument('--skip-crawl', action='store_true', help='跳过模拟爬取阶段')
+    bench.add_argument('--memory', action='store_true', help='使用 tracemalloc 记录每个阶段的峰值内存')
+    bench.add_argument('--profile-dir', help='使用 cProfile 分析每个阶段，结果保存到该目录')
+    bench.add_argument('--json', help='将结果保存为 JSON 文件，可作为之后比较的基线')
+    bench.add_argument('--baseline', help='与基线 JSON 比较，出现性能回退时以状态码 1 退出')
+    bench.add_argument('--tolerance', type=float, default=BENCH_REGRESSION_TOLERANCE,
+                       help='允许的耗时增加比例')
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv: List[str] = None):
+    parser = build_parser()
+    argv = list(sys.argv[1:] if argv is None else argv)
+    
+    # 未指定子命令时执行爬取，兼容原来的 python youtube-crawler.py [--resume] 用法
+    if not any(arg in COMMANDS for arg in argv) and not {'-h', '--help'} & set(argv):
+        global_args, rest = [], []
+        remaining = iter(argv)
+        for arg in remaining:
+            if arg == '--startup-report' or arg.startswith('--log-level='):
+                global_args.append(arg)
+            elif arg == '--log-level':
+                global_args += [arg, next(remaining, '')]
+            else:
+                rest.append(arg)
+        argv = global_args + ['crawl'] + rest
+    args = parser.parse_args(argv)
+    command_start = time.perf_counter()
+    setup_logging(getattr(logging, args.log_level), getattr(args, 'event_log', None))
+    
+    if getattr(args, 'keywords', None) is None:
+        args.keywords = DEFAULT_KEYWORDS
     
     try:
-        crawler.crawl_and_save(keywords)
-    except Exception as e:
-        print(f"爬取过程中断: {e}")
+        args.func(args)
+    finally:
+        if args.startup_report:
+            print_startup_report(command_start)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file